@@ -0,0 +1,213 @@
+"""Download benchmark: throughput and retry behavior of AsyncFetchEngine against the local stand-in server.
+
+    python benchmarks/bench_download.py [--documents 24] [--pages 40] [--latency 0.02]
+                                        [--bandwidth 4000000] [--backoff-base 0.05] [--breaker-cooldown 1]
+                                        [--large-documents 4] [--large-pages 1000] [--range-parts 4]
+                                        [--in-memory] [--scenario NAME ...] [--json results.json]
+
+The synthetic corpus from benchmarks/synthetic.py is served by
+benchmarks/standin_server.py, once per scenario:
+
+    clean       every request succeeds
+    throttled   half the documents answered 429 or 503 with Retry-After: 1 once
+    flaky       half the documents answered 500/502/504 once or twice
+    truncated   a third of the documents cut off halfway on the first try,
+                with the connection dropped
+    redirects   every document behind a chain of two 302s
+    outage      half the documents on a second host that answers 500 for
+                1.5 breaker cooldowns: its circuit opens, the first probe
+                fails, the second gets through; the first host keeps flowing
+    long_retry_after
+                the first document answered 429 with Retry-After: 86400 once,
+                far over the backoff cap: the host's circuit opens for one
+                cooldown instead, and the run finishes in seconds
+    probe_throttled
+                one document answered 500, 500, then 429 with Retry-After: 1,
+                under a breaker threshold of 2: the circuit opens, its probe
+                is throttled and re-opens it until Retry-After has passed,
+                and the next probe gets the document
+
+The large_* scenarios serve --large-documents documents of --large-pages
+pages instead (about 4 MB per 1000 pages), with a 1 MB range threshold:
+
+    large               one stream per document (--range-parts 1)
+    large_ranges        --range-parts parallel byte ranges per document
+    large_range_retry   as large_ranges, with each document's first Range
+                        request cut off halfway and retried on its own
+    large_fallback      the server advertises Accept-Ranges but answers
+                        Range requests with the whole body, so every
+                        document falls back to a single stream
+    large_fallback_error
+                        as large_fallback, with each document's first
+                        single-stream GET answered 500 and retried
+
+Faults are scripted per document (by its index in the corpus) rather
+than drawn at random, so every run sees the same ones.
+
+Each run reports wall time, MB/s, documents fetched and failed, the
+requests the servers saw by status, and how many fetched documents
+differ from what the server holds. Backoff and breaker cooldown are
+scaled down from the production defaults (--backoff-base, against 1 s,
+and --breaker-cooldown, against 120 s) so a run takes seconds.
+"""
+
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic  # noqa: E402
+from standin_server import StandInServer, delay, error, redirect, throttle, truncate  # noqa: E402
+
+from extract_citations.download import (  # noqa: E402
+    BREAKER_THRESHOLD, AsyncFetchEngine, RetryController, release_document)
+
+
+SCENARIOS = {  # name -> faults(index) scripted for the index-th document
+    "clean": lambda i: [],
+    "throttled": lambda i: [[], [throttle(429, retry_after=1)], [], [throttle(503, retry_after=1)]][i % 4],
+    "flaky": lambda i: [[], [error(500), error(502)], [], [error(504)]][i % 4],
+    "truncated": lambda i: [[], [truncate(0.5)], []][i % 3],
+    "redirects": lambda i: [redirect(2)],
+    "outage": lambda i: [],
+    "long_retry_after": lambda i: [throttle(429, retry_after=86400)] if i == 0 else [],
+    "probe_throttled": lambda i: [error(500), error(500), throttle(429, retry_after=1)],
+    "large": lambda i: [],
+    "large_ranges": lambda i: [],
+    "large_range_retry": lambda i: [delay(0), truncate(0.5)],  # the plain GET passes, the next request is cut
+    "large_fallback": lambda i: [],
+    "large_fallback_error": lambda i: [delay(0)] * 4 + [error(500)],  # the GET and 3 ranges pass, the fallback fails
+}
+LARGE_RANGE_THRESHOLD = 1024 * 1024
+PROBE_BREAKER_THRESHOLD = 2
+
+
+def read_document(document):
+    if isinstance(document, io.BytesIO):
+        return document.getvalue()
+    with open(document, "rb") as f:
+        return f.read()
+
+
+async def fetch_all(engine, urls):
+    queue = asyncio.Queue()
+    fetched = {}
+
+    async def consume():
+        for _ in urls:
+            url, document = await queue.get()
+            if document is not None:
+                fetched[url] = read_document(document)
+                release_document(document)
+
+    await asyncio.gather(engine.fetch_into(urls, queue), consume())
+    return fetched
+
+
+def run_scenario(name, corpus, args):
+    documents = dict(corpus)
+    if name == "probe_throttled":  # alone, so no other download closes the circuit in between
+        documents = dict(corpus[:1])
+    hosts = 2 if name == "outage" else 1
+    ranges = "ignore" if name.startswith("large_fallback") else "honor"
+    servers = [StandInServer(documents, latency=args.latency, bandwidth=args.bandwidth, ranges=ranges).start()
+               for _ in range(hosts)]
+    try:
+        urls = []
+        for index, document in enumerate(documents):
+            server = servers[index % hosts]
+            server.script(document, SCENARIOS[name](index))
+            urls.append(server.url(document))
+        if name == "outage":
+            servers[1].outage(1.5 * args.breaker_cooldown, error(500))
+        threshold = PROBE_BREAKER_THRESHOLD if name == "probe_throttled" else BREAKER_THRESHOLD
+        retry = RetryController(backoff_base=args.backoff_base, breaker_threshold=threshold,
+                                breaker_cooldown=args.breaker_cooldown, seed=args.seed)
+        engine = AsyncFetchEngine(host_rate=args.host_rate, host_burst=args.max_in_flight,
+                                  max_in_flight=args.max_in_flight, in_memory=args.in_memory, retry=retry,
+                                  range_parts=1 if name == "large" else args.range_parts,
+                                  range_threshold=LARGE_RANGE_THRESHOLD)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # "Downloaded ..." per URL
+            fetched = asyncio.run(fetch_all(engine, urls))
+        elapsed = time.perf_counter() - started
+        engine.downloader.close()
+    finally:
+        for server in servers:
+            server.stop()
+    statuses = sum((server.status_counts() for server in servers), collections.Counter())
+    fetched_bytes = sum(map(len, fetched.values()))
+    return {
+        "seconds": round(elapsed, 3),
+        "mb_per_sec": round(fetched_bytes / elapsed / 1e6, 3),
+        "documents": len(urls),
+        "fetched": len(fetched),
+        "failed": len(urls) - len(fetched),
+        "corrupt": sum(data != documents[url.rsplit("/", 1)[1]] for url, data in fetched.items()),
+        "requests": sum(statuses.values()),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "retries": retry.retried,
+        "bytes_served": sum(server.bytes_sent() for server in servers),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=24)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds before each response")
+    parser.add_argument("--bandwidth", type=int, default=4_000_000, help="bytes per second per response")
+    parser.add_argument("--backoff-base", type=float, default=0.05)
+    parser.add_argument("--breaker-cooldown", type=float, default=1.0)
+    parser.add_argument("--large-documents", type=int, default=4)
+    parser.add_argument("--large-pages", type=int, default=1000)
+    parser.add_argument("--range-parts", type=int, default=4)
+    parser.add_argument("--host-rate", type=float, default=100.0, help="requests per second to the server")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--in-memory", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="run only these scenarios (default: all)")
+    parser.add_argument("--json", help="write the results here")
+    args = parser.parse_args(argv)
+
+    names = args.scenario or list(SCENARIOS)
+    corpus = synthetic.make_corpus(args.documents, args.pages, seed=args.seed)
+    large_corpus = []
+    if any(name.startswith("large") for name in names):
+        large_corpus = synthetic.make_corpus(args.large_documents, args.large_pages, seed=args.seed)
+    print(f"{args.documents} documents, {sum(len(data) for _, data in corpus) / 1e6:.1f} MB "
+          f"({args.large_documents} large, {sum(len(data) for _, data in large_corpus) / 1e6:.1f} MB), "
+          f"latency {args.latency * 1000:g} ms, {args.bandwidth / 1e6:g} MB/s per response")
+    print(f"{'scenario':18} {'seconds':>8} {'MB/s':>7} {'fetched':>8} {'failed':>7} {'corrupt':>8} "
+          f"{'requests':>9} {'retries':>8}  statuses")
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # failed_downloads.txt lands here
+        try:
+            for name in names:
+                result = results[name] = run_scenario(name, large_corpus if name.startswith("large") else corpus,
+                                                      args)
+                statuses = " ".join(f"{status}x{count}" for status, count in result["statuses"].items())
+                print(f"{name:18} {result['seconds']:8.2f} {result['mb_per_sec']:7.2f} {result['fetched']:8} "
+                      f"{result['failed']:7} {result['corrupt']:8} {result['requests']:9} {result['retries']:8}  {statuses}")
+        finally:
+            os.chdir(cwd)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "scenarios": results}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
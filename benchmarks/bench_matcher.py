@@ -0,0 +1,132 @@
+"""Micro-benchmark: CitationMatcher versus the per-page regex + clean_citation path it replaced.
+
+    python benchmarks/bench_matcher.py [--pages 2000] [--cited-pages 0.2] [--repeat 5]
+
+The matcher is timed with and without its literal prefilter; all three
+paths must agree on the citations found. The prefilter must also agree
+with the plain matcher on citations broken up by runs of blank lines.
+"""
+
+
+import argparse
+import collections
+import os
+import random
+import re
+import sys
+import timeit
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract_citations import matching  # noqa: E402
+
+
+LEGACY_PATTERN = (
+    r"\b(\d+)\s*(U\.S\.C\.|USC|U\.S\. Code)\s*§?\s*(\d+(\.\d+)*([a-zA-Z0-9]*)?)|"
+    r"\b(\d+)\s*(C\.F\.R\.|CFR|Code of Federal Regulations)\s*§?\s*(\d+(\.\d+)*([a-zA-Z0-9]*)?)|"
+    r"(E\.O\.|Executive\s*Order)\s*(\d+)|"
+    r"\bEO\s+(\d+)\b"
+)
+
+CITATIONS = [
+    "5 U.S.C. 552a(b)", "44 U.S.C. § 3101", "7 CFR 1900.5", "36 C.F.R. 1220.18",
+    "40 Code of Federal Regulations 102", "5 U.S. Code 301", "Executive Order 13556", "E.O. 12344", "EO 14028",
+]
+SPREAD_CITATIONS = [  # the pattern's whitespace spans any number of blank lines; the prefilter must keep up
+    "See Executive Order\n \n \n \n12866", "pursuant to 44\n\n\n\nU.S.C. 3101", "5 U.S.C.\n\n\n\n\n552a(b)",
+    "7\n\n\nCFR\n\t\n\u00a7\n\n\n1900.5", "E.O.\n \n\n \n14028", "EO\n\n\n\n\n13556 and 36 C.F.R.\n\n\n\n1220.18",
+]
+FILLER = (
+    "The agency shall maintain records of its activities and ensure that information "
+    "technology investments are reviewed in accordance with departmental policy."
+)
+
+
+def make_corpus(pages, cited_pages=0.2, seed=0):
+    """Returns `pages` page texts; a `cited_pages` fraction of them carry citations."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(pages):
+        cited = rng.random() < cited_pages
+        lines = []
+        for _ in range(40):
+            if cited and rng.random() < 0.08:
+                lines.append(f"Pursuant to {rng.choice(CITATIONS)}, the following applies.")
+            else:
+                lines.append(FILLER)
+        corpus.append("\n".join(lines))
+    return corpus
+
+
+def make_spread_corpus(pages, seed=0):
+    """Returns `pages` page texts whose citations have runs of blank lines in place of spaces."""
+    rng = random.Random(seed)
+    corpus = list(SPREAD_CITATIONS)
+    for _ in range(pages):
+        lines = [FILLER] * rng.randint(0, 3)
+        for citation in rng.sample(CITATIONS, 3):
+            lines.append(re.sub(" ", lambda _: "\n" + " \n" * rng.randint(0, 4), citation))
+            lines.extend([FILLER] * rng.randint(0, 3))
+        corpus.append("\n".join(lines))
+    return corpus
+
+
+def legacy_clean_citation(citation):
+    citation = re.sub(r"\b(\d+)\s*(U\.S\.C\.|USC)\s*(\d+)\b", r"\1 USC \3", citation)
+    citation = re.sub(r"\b(\d+)\s*(C\.F\.R\.|CFR)\s*(\d+)\b", r"\1 CFR \3", citation)
+    citation = re.sub(r"\b(E\.O\.|Executive\s*Order)\s*(\d+)\b", r"Executive Order \2", citation)
+    citation = re.sub(r"\bEO\s+(\d+)\b", r"EO \1", citation)
+    return citation
+
+
+def legacy_match(corpus):
+    found = []
+    for text in corpus:
+        for match in re.finditer(LEGACY_PATTERN, text, re.IGNORECASE):
+            citation_text = match.group(0)
+            citation_number = match.group(10) or match.group(8)
+            if citation_number:
+                citation_text = f"EO {citation_number}"
+            found.append((legacy_clean_citation(citation_text), match.start()))
+    return found
+
+
+def matcher_match(matcher, corpus, stats=None):
+    return [(citation.citation, citation.start) for text in corpus for citation in matcher.finditer(text, stats)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--cited-pages", type=float, default=0.2,
+                        help="fraction of pages that contain citations")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    corpus = make_corpus(args.pages, args.cited_pages)
+    matchers = {
+        "no prefilter": matching.CitationMatcher(prefilter=False),
+        "prefilter": matching.CitationMatcher(),
+    }
+    legacy = legacy_match(corpus)
+    stats = collections.Counter()
+    current = matcher_match(matchers["prefilter"], corpus, stats)
+    assert current == matcher_match(matchers["no prefilter"], corpus), "prefilter changed the results"
+    assert [start for _, start in legacy] == [start for _, start in current], "matchers disagree on spans"
+    spread = make_spread_corpus(args.pages // 10)
+    assert matcher_match(matchers["prefilter"], spread) == matcher_match(matchers["no prefilter"], spread), \
+        "prefilter changed the results on citations split across blank lines"
+
+    timings = {"legacy": min(timeit.repeat(lambda: legacy_match(corpus), number=1, repeat=args.repeat))}
+    for name, matcher in matchers.items():
+        timings[name] = min(timeit.repeat(lambda: matcher_match(matcher, corpus), number=1, repeat=args.repeat))
+    print(f"{args.pages} pages, {len(current)} citations; prefilter skipped "
+          f"{stats['pages_skipped']} pages and scanned {stats['pages_scanned']}")
+    for name, seconds in timings.items():
+        print(f"{name:>13}: {seconds * 1000:8.1f} ms  ({args.pages / seconds:,.0f} pages/s, "
+              f"{timings['legacy'] / seconds:.2f}x legacy)")
+
+
+if __name__ == "__main__":
+    main()
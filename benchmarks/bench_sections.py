@@ -0,0 +1,148 @@
+"""Section inference benchmark: validates the bisect TocIndex and PageHeadings against the
+linear scans they replaced and times both.
+
+    python benchmarks/bench_sections.py [--toc-entries 300] [--lookups 20000] [--page-lines 400] [--repeat 5]
+
+The old heading fallback looked the sanitized context up in the raw page,
+which rarely matches; it is validated here with the raw context it meant
+to find, and timed with the sanitized one it actually used.
+"""
+
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract_citations import matching  # noqa: E402
+
+
+def legacy_toc_section(toc, page_num):
+    """The TOC half of the old infer_section_name; None means it fell through."""
+    for i, (section, start_page) in enumerate(toc):
+        if i + 1 < len(toc) and toc[i + 1][1] > page_num >= start_page:
+            return section
+        elif i == len(toc) - 1 and page_num >= start_page:
+            return section
+    return None
+
+
+def legacy_heading(context, page_text, sanitize_text):
+    """The heading fallback of the old infer_section_name."""
+    lines = page_text.splitlines()
+    context_start = page_text.find(context)
+    for i in range(len(lines) - 1, -1, -1):
+        if len(lines[i].strip()) > 0 and lines[i].strip() in page_text[:context_start]:
+            return sanitize_text(lines[i])
+    return "Unknown Section"
+
+
+def make_page(lines, rng):
+    """A dense page: numbered headings, numbered prose lines, blank lines and citations."""
+    page = []
+    for i in range(lines):
+        roll = rng.random()
+        if roll < 0.05:
+            page.append(f"{i}. Heading number {i}")
+        elif roll < 0.1:
+            page.append("")
+        elif roll < 0.3:
+            page.append(f"Line {i} applies 7 CFR {1900 + i}.{i % 9} to the program.")
+        else:
+            page.append(f"Line {i} of the agency narrative describing the records it keeps.")
+    return "\n".join(page)
+
+
+def bench_headings(args, rng):
+    pages = [make_page(args.page_lines, rng) for _ in range(args.pages)]
+    citations = [[citation.start for citation in matching.CITATION_MATCHER.finditer(page)] for page in pages]
+
+    mismatches = 0
+    for page, starts in zip(pages, citations):
+        headings = matching.PageHeadings(page)
+        for start in starts:
+            context_start = max(0, start - 100)
+            raw_context = page[context_start:start + 100]
+            expected = legacy_heading(raw_context, page, matching.sanitize_text)
+            found = headings.heading_before(context_start) or "Unknown Section"
+            mismatches += expected != found
+    print(f"validated {sum(map(len, citations))} citations on {args.pages} pages: "
+          f"{mismatches} mismatches against the line scan")
+    assert mismatches == 0
+
+    def legacy():
+        for page, starts in zip(pages, citations):
+            for start in starts:
+                legacy_heading(matching.sanitize_text(page[max(0, start - 100):start + 100]), page, matching.sanitize_text)
+
+    def indexed():
+        for page, starts in zip(pages, citations):
+            headings = matching.PageHeadings(page)
+            for start in starts:
+                headings.heading_before(max(0, start - 100))
+
+    legacy_time = min(timeit.repeat(legacy, number=1, repeat=args.repeat))
+    indexed_time = min(timeit.repeat(indexed, number=1, repeat=args.repeat))
+    print(f"heading fallback for {sum(map(len, citations))} citations on {args.pages} {args.page_lines}-line pages")
+    print(f"    line scan: {legacy_time * 1000:8.1f} ms")
+    print(f" PageHeadings: {indexed_time * 1000:8.1f} ms  ({legacy_time / indexed_time:.0f}x)")
+
+
+def make_toc(entries, rng):
+    """A sorted TOC with some sections sharing a start page, as real TOCs have."""
+    page = rng.randint(1, 5)
+    toc = []
+    for i in range(entries):
+        toc.append((f"Section {i}", page))
+        page += rng.choice((0, 1, 1, 2, 3))
+    return toc
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--toc-entries", type=int, default=300)
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--page-lines", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+
+    mismatches = unsorted_changes = 0
+    for _ in range(args.documents):
+        toc = make_toc(rng.randint(1, args.toc_entries), rng)
+        index = matching.TocIndex(toc)
+        last_page = toc[-1][1] + 5
+        for page_num in range(0, last_page + 1):
+            mismatches += legacy_toc_section(toc, page_num) != index.section_for(page_num)
+        shuffled = toc[:]
+        rng.shuffle(shuffled)
+        shuffled_index = matching.TocIndex(shuffled)
+        for page_num in range(0, last_page + 1):
+            unsorted_changes += legacy_toc_section(shuffled, page_num) != shuffled_index.section_for(page_num)
+    print(f"validated {args.documents} sorted TOCs: {mismatches} mismatches against the linear scan")
+    print(f"shuffled TOCs: the linear scan gave a different section for {unsorted_changes} pages")
+    assert mismatches == 0
+
+    toc = make_toc(args.toc_entries, rng)
+    pages = [rng.randint(0, toc[-1][1] + 5) for _ in range(args.lookups)]
+    index = matching.TocIndex(toc)
+    legacy = min(timeit.repeat(lambda: [legacy_toc_section(toc, page) for page in pages],
+                               number=1, repeat=args.repeat))
+    indexed = min(timeit.repeat(lambda: [index.section_for(page) for page in pages],
+                                number=1, repeat=args.repeat))
+    print(f"{args.lookups} lookups in a {args.toc_entries}-entry TOC")
+    print(f"  linear scan: {legacy * 1000:8.1f} ms")
+    print(f"     TocIndex: {indexed * 1000:8.1f} ms  ({legacy / indexed:.0f}x)")
+
+    bench_headings(args, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Output sink benchmark: write time and file size of every --format against xlsx.
+
+    python benchmarks/bench_sinks.py [--rows 100000] [--batch 50]
+
+Rows are synthetic but shaped like real output: a few dozen documents,
+repeated section names and ~200 character contexts, handed to the sink
+in per-document batches the way the pipeline does. Every file is read
+back and its row count checked.
+"""
+
+
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract_citations import sinks  # noqa: E402
+
+
+CITATIONS = ["5 USC 552a", "44 USC 3101", "7 CFR 1900.5", "36 CFR 1220.18", "Executive Order 13556", "EO 12344"]
+WORDS = "the agency shall maintain records of its activities and review information technology investments".split()
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    urls = [f"https://www.usda.gov/sites/default/files/documents/DR{3000 + i}-001.pdf" for i in range(40)]
+    sections = [f"{i}. {' '.join(rng.sample(WORDS, 4)).title()}" for i in range(60)]
+    rows = []
+    for _ in range(count):
+        url = rng.choice(urls)
+        context = " ".join(rng.choice(WORDS) for _ in range(30))
+        rows.append((rng.choice(CITATIONS), f"{url}#page={rng.randint(1, 80)}", rng.choice(sections), context, url))
+    return rows
+
+
+def count_rows(output_format, path):
+    if output_format == "xlsx":
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        return sum(1 for _ in workbook.active.iter_rows(values_only=True)) - 1
+    if output_format == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            return sum(1 for _ in csv.reader(f)) - 1
+    if output_format == "ndjson":
+        with open(path, encoding="utf-8") as f:
+            return sum(1 for line in f if json.loads(line))
+    if output_format == "parquet":
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetFile(path).metadata.num_rows
+    import pyarrow.ipc
+    with pyarrow.ipc.open_file(path) as reader:
+        return reader.read_all().num_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=50, help="rows per write_rows call")
+    parser.add_argument("--formats", nargs="*")
+    args = parser.parse_args(argv)
+
+    formats = args.formats or list(sinks.SINKS)
+    if importlib.util.find_spec("pyarrow") is None:
+        formats = [name for name in formats if name not in sinks.PYARROW_FORMATS]
+        print("pyarrow is not installed; skipping", ", ".join(sinks.PYARROW_FORMATS))
+    rows = make_rows(args.rows)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for output_format in formats:
+            path = os.path.join(tmp, f"citations.{output_format}")
+            start = time.perf_counter()
+            sink = sinks.make_sink(output_format, path)
+            for i in range(0, len(rows), args.batch):
+                sink.write_rows(rows[i:i + args.batch])
+            sink.close()
+            elapsed = time.perf_counter() - start
+            assert count_rows(output_format, path) == len(rows), output_format
+            results[output_format] = elapsed, os.path.getsize(path)
+
+    base_time, base_size = results.get("xlsx", (None, None))
+    print(f"{args.rows} rows in batches of {args.batch}")
+    for output_format, (elapsed, size) in results.items():
+        line = f"  {output_format:8} {elapsed:7.2f} s {size / 1024 / 1024:8.2f} MiB"
+        if base_time:
+            line += f"  ({base_time / elapsed:5.1f}x faster, {size / base_size:6.1%} of the xlsx size)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
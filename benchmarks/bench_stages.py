@@ -0,0 +1,195 @@
+"""Offline stage benchmark: per-stage throughput on a synthetic PDF corpus, with a regression gate.
+
+    python benchmarks/bench_stages.py [--documents 4] [--pages 40] [--density 2] [--repeat 3]
+                                      [--json results.json] [--baseline baseline.json] [--threshold 0.25]
+
+Two corpora are generated with benchmarks/synthetic.py, one with a
+"Table of Contents" page and one without (which sends section inference
+down the heading fallback), and every stage is timed on each:
+
+    extract_text        PyPDF2 extract_text() over every page       pages/s
+    extract_toc         TOC detection on the first ten pages        pages/s
+    match               CitationMatcher.finditer over every page    pages/s
+    normalize           Citation building from pattern matches      citations/s
+                        (what clean_citation used to do)
+    infer_section_name  TOC index or heading lookup per citation    citations/s
+    save_to_excel       XlsxSink, one write_rows call per document  citations/s
+    parse               load_pages + iter_citations, end to end     pages/s
+
+Each stage keeps its best time over --repeat runs of at least 0.2 s.
+Results are written as JSON with --json; given a --baseline from an
+earlier run, the script
+exits with status 1 when any stage's throughput falls more than
+--threshold below it, so CI can run it against a checked-in baseline.
+"""
+
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+
+import PyPDF2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic  # noqa: E402
+from extract_citations import matching, pdf, sinks  # noqa: E402
+
+
+def best_time(func, repeat):
+    """Seconds per call: the best of `repeat` measurements, each looping `func` for at least 0.2 s
+    so the sub-millisecond stages are not lost in timer noise."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def result(seconds, pages=None, citations=None):
+    entry = {"seconds": round(seconds, 6)}
+    if pages is not None:
+        entry.update(pages=pages, pages_per_sec=round(pages / seconds, 2), throughput=round(pages / seconds, 2),
+                     unit="pages/s")
+    if citations is not None:
+        entry.update(citations=citations, citations_per_sec=round(citations / seconds, 2))
+        if pages is None:
+            entry.update(throughput=round(citations / seconds, 2), unit="citations/s")
+    return entry
+
+
+def bench_corpus(corpus, repeat):
+    """Times every stage over `corpus`, a list of (name, pdf_bytes)."""
+    documents = [(f"https://example.gov/{name}", data) for name, data in corpus]
+    texts = [[page.extract_text() for page in PyPDF2.PdfReader(io.BytesIO(data)).pages] for _, data in documents]
+    pages = sum(map(len, texts))
+    tocs = [matching.extract_toc(pdf.PageTextProvider(page_texts=page_texts, extracted=True)) for page_texts in texts]
+    matches = [[list(matching.CITATION_MATCHER.pattern.finditer(text)) for text in page_texts] for page_texts in texts]
+    citations = sum(len(page_matches) for document in matches for page_matches in document)
+    batches = [list(matching.iter_citations(toc, page_texts)) for toc, page_texts in zip(tocs, texts)]
+    stages = {}
+
+    def extract_text():
+        for _, data in documents:
+            for page in PyPDF2.PdfReader(io.BytesIO(data)).pages:
+                page.extract_text()
+
+    def extract_toc():
+        for page_texts in texts:
+            matching.extract_toc(pdf.PageTextProvider(page_texts=page_texts, extracted=True))
+
+    def match():
+        for page_texts in texts:
+            for text in page_texts:
+                for _ in matching.CITATION_MATCHER.finditer(text):
+                    pass
+
+    def normalize():
+        for document in matches:
+            for page_matches in document:
+                for found in page_matches:
+                    matching.CitationMatcher.citation(found)
+
+    def infer_section_name():
+        for toc, page_texts, document in zip(tocs, texts, matches):
+            index = matching.TocIndex(toc)
+            for page_num, (text, page_matches) in enumerate(zip(page_texts, document)):
+                headings = matching.PageHeadings(text)
+                for found in page_matches:
+                    matching.infer_section_name(index, page_num + 1, headings, max(0, found.start() - 100))
+
+    def save_to_excel():
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = sinks.XlsxSink(os.path.join(tmp, "citations.xlsx"))
+            for (url, _), batch in zip(documents, batches):
+                sink.write_rows(matching.expand_citations(url, batch))
+            sink.close()
+
+    def parse():
+        for _, data in documents:
+            toc, provider = pdf.load_pages(data)
+            for _ in matching.iter_citations(toc, provider):
+                pass
+
+    toc_pages = sum(min(10, len(page_texts)) for page_texts in texts)
+    stages["extract_text"] = result(best_time(extract_text, repeat), pages=pages)
+    stages["extract_toc"] = result(best_time(extract_toc, repeat), pages=toc_pages)
+    stages["match"] = result(best_time(match, repeat), pages=pages, citations=citations)
+    stages["normalize"] = result(best_time(normalize, repeat), citations=citations)
+    stages["infer_section_name"] = result(best_time(infer_section_name, repeat), citations=citations)
+    stdout = sys.stdout
+    sys.stdout = io.StringIO()  # XlsxSink.close announces the file on every repeat
+    try:
+        stages["save_to_excel"] = result(best_time(save_to_excel, repeat), citations=citations)
+    finally:
+        sys.stdout = stdout
+    stages["parse"] = result(best_time(parse, repeat), pages=pages, citations=citations)
+    return stages
+
+
+def find_regressions(results, baseline, threshold):
+    """Returns a line per (variant, stage) whose throughput fell more than `threshold` below `baseline`."""
+    regressions = []
+    for variant, stages in baseline["variants"].items():
+        for stage, before in stages.items():
+            now = results["variants"].get(variant, {}).get(stage)
+            if now is None:
+                continue
+            floor = before["throughput"] * (1 - threshold)
+            if now["throughput"] < floor:
+                regressions.append(f"{variant}/{stage}: {now['throughput']:,.0f} {now['unit']} "
+                                   f"against {before['throughput']:,.0f} in the baseline "
+                                   f"({now['throughput'] / before['throughput'] - 1:+.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--density", type=float, default=2.0, help="average citations per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fail when a stage is this fraction slower than the baseline")
+    args = parser.parse_args(argv)
+
+    config = {key: getattr(args, key) for key in ("documents", "pages", "density", "seed", "repeat")}
+    results = {
+        "config": config,
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "pypdf2": PyPDF2.__version__},
+        "variants": {},
+    }
+    for variant, toc in (("toc", True), ("no_toc", False)):
+        corpus = synthetic.make_corpus(args.documents, args.pages, args.density, toc, args.seed)
+        results["variants"][variant] = stages = bench_corpus(corpus, args.repeat)
+        print(f"{variant}: {args.documents} documents x {args.pages} pages, {args.density:g} citations/page")
+        for stage, entry in stages.items():
+            print(f"  {stage:20} {entry['seconds'] * 1000:9.1f} ms {entry['throughput']:12,.0f} {entry['unit']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print(f"warning: baseline was run with {baseline.get('config')}, this run with {config}")
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"No stage regressed beyond {args.threshold:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Local stand-in for the agency web servers, for offline download benchmarks.
+
+    with StandInServer(documents, latency=0.05, bandwidth=2_000_000) as server:
+        server.script("doc0.pdf", [throttle(429, retry_after=1), truncate(0.5)])
+        urls = [server.url(name) for name in documents]
+        ...
+
+Serves PDFs from a {name: bytes} mapping or a directory over keep-alive
+HTTP/1.1 on 127.0.0.1, with ETags and conditional GETs like the real
+servers. Single byte ranges are served as 206s, honoring If-Range, unless
+`ranges` is "ignore" (Accept-Ranges is advertised but every response is
+the whole body) or "none" (no Accept-Ranges at all). Every response can be slowed down (`latency` before the headers,
+`bandwidth` in bytes per second for the body) and faults can be injected:
+
+- script(name, faults) queues faults for one document, used one per request
+  until the queue is empty, after which the document is served normally;
+- outage(seconds, fault) answers every request with `fault` for the next
+  `seconds`, ahead of any script;
+- `random_faults`, a list of (probability, fault), draws a fault for any
+  request that has no scripted one, from a seeded generator.
+
+A fault is one of throttle() (429/503 with Retry-After), error() (any
+status, no Retry-After), truncate() (the full Content-Length is announced,
+part of the body sent, then the connection dropped), redirect() (a chain
+of 302s ending at a fault-free copy of the document) and delay() (extra latency). Each request
+is logged in `requests` as (method, path, status, body bytes sent).
+
+    python benchmarks/standin_server.py DIR [--port 8765] [--latency 0.05] [--bandwidth 1000000]
+
+serves a directory by hand, e.g. one written by benchmarks/synthetic.py.
+"""
+
+
+import argparse
+import collections
+import hashlib
+import http.server
+import os
+import random
+import re
+import sys
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+
+SEND_CHUNK = 16 * 1024
+REDIRECT_PREFIX = "/_redirect/"
+
+Fault = collections.namedtuple("Fault", "kind status retry_after fraction hops seconds", defaults=(None,) * 5)
+
+
+def throttle(status=429, retry_after=1):
+    """`retry_after` may be a number of seconds, an HTTP date string, or None to leave the header out."""
+    return Fault("throttle", status, retry_after=retry_after)
+
+
+def error(status=500):
+    return Fault("error", status)
+
+
+def truncate(fraction=0.5):
+    return Fault("truncate", fraction=fraction)
+
+
+def redirect(hops=1):
+    return Fault("redirect", hops=hops)
+
+
+def delay(seconds):
+    return Fault("delay", seconds=seconds)
+
+
+class StandInServer:
+    """Threaded HTTP server on a free local port; use it as a context manager or call start() and stop()."""
+
+    def __init__(self, documents=None, directory=None, latency=0.0, bandwidth=None,
+                 random_faults=(), seed=0, ranges="honor", port=0):
+        self.documents = dict(documents or {})
+        if directory is not None:
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    with open(path, "rb") as f:
+                        self.documents[name] = f.read()
+        self.etags = {name: '"%s"' % hashlib.sha256(data).hexdigest()[:16] for name, data in self.documents.items()}
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.ranges = ranges
+        self.random_faults = list(random_faults)
+        self.rng = random.Random(seed)
+        self.scripts = collections.defaultdict(collections.deque)
+        self.outage_until = 0.0
+        self.outage_fault = None
+        self.requests = []
+        self.lock = threading.Lock()
+        self.httpd = _Server(("127.0.0.1", port), _handler(self))
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, name):
+        return f"{self.base_url}/{name}"
+
+    def script(self, name, faults):
+        with self.lock:
+            self.scripts[name].extend(faults)
+
+    def outage(self, seconds, fault=None):
+        with self.lock:
+            self.outage_until = time.monotonic() + seconds
+            self.outage_fault = fault or error(503)
+
+    def next_fault(self, name):
+        with self.lock:
+            if time.monotonic() < self.outage_until:
+                return self.outage_fault
+            if self.scripts[name]:
+                return self.scripts[name].popleft()
+            roll = self.rng.random()
+            for probability, fault in self.random_faults:
+                if roll < probability:
+                    return fault
+                roll -= probability
+        return None
+
+    def log(self, method, path, status, sent):
+        with self.lock:
+            self.requests.append((method, path, status, sent))
+
+    def status_counts(self):
+        with self.lock:
+            return collections.Counter(status for _, _, status, _ in self.requests)
+
+    def bytes_sent(self):
+        with self.lock:
+            return sum(sent for _, _, _, sent in self.requests)
+
+    def reset_log(self):
+        with self.lock:
+            self.requests.clear()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="standin-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients drop connections on purpose (the rest of a range's first stream, failed transfers).
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+def _handler(server):
+    class Handler(_StandInHandler):
+        standin = server
+    return Handler
+
+
+class _StandInHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse shows up as it would live
+    standin = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.serve(body=False)
+
+    def do_GET(self):
+        self.serve(body=True)
+
+    def serve(self, body):
+        path = unquote(urlsplit(self.path).path)
+        redirected = path.startswith(REDIRECT_PREFIX)
+        if redirected:
+            hops, _, name = path[len(REDIRECT_PREFIX):].partition("/")
+            if int(hops):
+                return self.redirect(f"{REDIRECT_PREFIX}{int(hops) - 1}/{name}")
+        else:
+            name = path.lstrip("/")
+        if self.standin.latency:
+            time.sleep(self.standin.latency)
+        data = self.standin.documents.get(name)
+        if data is None:
+            return self.empty(404)
+        fault = None if redirected else self.standin.next_fault(name)  # the end of a chain is served as is
+        if fault is not None and fault.kind == "delay":
+            time.sleep(fault.seconds)
+        elif fault is not None and fault.kind == "throttle":
+            return self.empty(fault.status, {} if fault.retry_after is None else {"Retry-After": str(fault.retry_after)})
+        elif fault is not None and fault.kind == "error":
+            return self.empty(fault.status)
+        elif fault is not None and fault.kind == "redirect":
+            return self.redirect(f"{REDIRECT_PREFIX}{fault.hops}/{name}")
+        etag = self.standin.etags[name]
+        if self.headers.get("If-None-Match") == etag:
+            return self.empty(304, {"ETag": etag})
+        status, content_range = 200, None
+        requested = self.byte_range(len(data), etag)
+        if requested is not None:
+            start, end = requested
+            status, content_range = 206, f"bytes {start}-{end}/{len(data)}"
+            data = data[start:end + 1]
+        self.send_response(status)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        if self.standin.ranges != "none":
+            self.send_header("Accept-Ranges", "bytes")
+        if content_range:
+            self.send_header("Content-Range", content_range)
+        self.end_headers()
+        if not body:
+            return self.standin.log("HEAD", self.path, status, 0)
+        if fault is not None and fault.kind == "truncate":
+            data = data[:int(len(data) * fault.fraction)]
+            self.close_connection = True
+        sent = self.send_body(data)
+        self.standin.log("GET", self.path, status, sent)
+
+    def byte_range(self, size, etag):
+        """Returns the (start, end) of a single "bytes=start-end" Range this request should get, or None
+        for the whole body (no Range, several ranges, ranges off, or an If-Range that no longer matches)."""
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", "").strip())
+        if match is None or self.standin.ranges != "honor" or self.headers.get("If-Range", etag) != etag:
+            return None
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        elif last:
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            return None
+        return (start, end) if start <= end else None
+
+    def send_body(self, data):
+        sent = 0
+        view = memoryview(data)
+        try:
+            while sent < len(data):
+                chunk = view[sent:sent + SEND_CHUNK]
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if self.standin.bandwidth:
+                    time.sleep(len(chunk) / self.standin.bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        return sent
+
+    def empty(self, status, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        self.standin.log(self.command, self.path, status, 0)
+
+    def redirect(self, location):
+        self.empty(302, {"Location": location})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a directory of PDFs with injectable latency and bandwidth.")
+    parser.add_argument("directory")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--bandwidth", type=int, help="bytes per second per response")
+    args = parser.parse_args(argv)
+    server = StandInServer(directory=args.directory, latency=args.latency, bandwidth=args.bandwidth, port=args.port)
+    print(f"Serving {len(server.documents)} documents from {args.directory} at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
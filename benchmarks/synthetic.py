@@ -0,0 +1,139 @@
+"""Deterministic synthetic PDFs for offline benchmarks.
+
+    python benchmarks/synthetic.py OUT_DIR [--documents 4] [--pages 40] [--density 2] [--no-toc]
+
+The PDFs are written by hand (uncompressed content streams, the standard
+Helvetica font, no timestamps), so the same arguments always produce the
+same bytes and PyPDF2 reads the text back line for line. Pages carry
+section headings, filler prose and `density` citations on average; with
+`toc` the first page is a "Table of Contents" listing each section's
+start page the way extract_toc expects.
+"""
+
+
+import argparse
+import os
+import random
+
+
+CITATIONS = [
+    "5 U.S.C. 552a(b)", "44 U.S.C. 3101", "7 CFR 1900.5", "36 C.F.R. 1220.18",
+    "40 Code of Federal Regulations 102", "5 U.S. Code 301", "Executive Order 13556", "E.O. 12344", "EO 14028",
+]
+SECTION_WORDS = ["Records", "Management", "Privacy", "Security", "Investments", "Governance", "Policy",
+                 "Responsibilities", "Definitions", "Authorities", "Procedures", "Reporting"]
+PROSE = [
+    "The agency shall maintain records of its activities and decisions.",
+    "Information technology investments are reviewed in accordance with departmental policy.",
+    "Each mission area designates an official responsible for compliance.",
+    "Program managers document the requirements before acquisition begins.",
+    "Records are retained and disposed of according to approved schedules.",
+    "Waivers must be requested in writing and approved in advance.",
+]
+LINES_PER_PAGE = 50
+FONT_SIZE = 10
+LEADING = 13
+
+
+def make_document(pages=40, density=2.0, toc=True, seed=0):
+    """Returns (page_texts, sections) where sections lists (title, start_page) in page order.
+
+    Page numbers are 1-based like the TOC entries; with `toc`, page 1 is
+    the table of contents and the body starts on page 2.
+    """
+    rng = random.Random(seed)
+    first_body_page = 2 if toc else 1
+    body_pages = range(first_body_page, pages + 1)
+    starts = sorted(rng.sample(list(body_pages), max(1, len(body_pages) // 4)))
+    sections = []
+    for start in starts:
+        title = " ".join(rng.sample(SECTION_WORDS, 2))
+        sections.append((f"{title} Section", start))
+    starts_at = {start: title for title, start in sections}
+
+    page_texts = []
+    if toc:
+        page_texts.append("\n".join(["Table of Contents"] + [f"{title} {start}" for title, start in sections]))
+    for page in body_pages:
+        lines = []
+        if page in starts_at:
+            lines.append(starts_at[page])
+        free_lines = range(len(lines), LINES_PER_PAGE)
+        citations = sum(rng.random() < density / len(free_lines) for _ in free_lines)  # ~density per page
+        cited_lines = set(rng.sample(free_lines, citations))
+        for i in range(len(lines), LINES_PER_PAGE):
+            sentence = rng.choice(PROSE)
+            if i in cited_lines:
+                sentence = f"Pursuant to {rng.choice(CITATIONS)}, {sentence[0].lower()}{sentence[1:]}"
+            lines.append(sentence)
+        page_texts.append("\n".join(lines))
+    return page_texts, sections
+
+
+def _pdf_string(text):
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def render_pdf(page_texts):
+    """Lays each page text out one line per text line and returns the PDF bytes."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # the page tree, once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_refs = []
+    for text in page_texts:
+        lines = text.split("\n")
+        ops = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL 56 760 Td"]
+        ops += [f"{_pdf_string(line)} Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        contents = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % contents)
+        page_refs.append(len(objects))
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_refs))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_pdf(pages=40, density=2.0, toc=True, seed=0):
+    """Returns (pdf_bytes, page_texts, sections) for one synthetic document."""
+    page_texts, sections = make_document(pages, density, toc, seed)
+    return render_pdf(page_texts), page_texts, sections
+
+
+def make_corpus(documents=4, pages=40, density=2.0, toc=True, seed=0):
+    """Returns a list of (name, pdf_bytes) with one seed per document."""
+    return [(f"doc{i}.pdf", make_pdf(pages, density, toc, seed + i)[0]) for i in range(documents)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic PDF corpus.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--documents", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--density", type=float, default=2.0, help="average citations per page")
+    parser.add_argument("--no-toc", dest="toc", action="store_false")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    os.makedirs(args.out_dir, exist_ok=True)
+    for name, data in make_corpus(args.documents, args.pages, args.density, args.toc, args.seed):
+        with open(os.path.join(args.out_dir, name), "wb") as f:
+            f.write(data)
+    print(f"Wrote {args.documents} PDFs of {args.pages} pages to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Extracts U.S. Code, CFR and Executive Order citations from agency PDFs.
+
+Run it with ``python -m extract_citations MANIFEST [MANIFEST ...]``; the
+modules can also be used on their own:
+
+- download: pooled, rate-limited downloads and the PDF cache
+- pdf: page text extraction and the page-text cache
+- matching: citation matching and section inference
+- sinks: xlsx, csv, ndjson, parquet and arrow output
+- store: the SQLite citation store and run manifest
+- pipeline: the staged fetch/extract/match/write pipeline
+- corpus: manifest files and URL normalization
+- metrics: stage timings, counters and run reports
+- profiling: per-document cProfile and tracemalloc reports
+"""
+
+
+from .corpus import load_corpus, normalize_url
+from .matching import CITATION_MATCHER, CitationMatcher, iter_citations
+from .metrics import Metrics
+from .pipeline import Pipeline, extract_us_code_citations, process_url
+from .sinks import SINKS, make_sink, save_to_excel
+from .store import CitationStore, RunManifest
+
+__all__ = [
+    "CITATION_MATCHER", "CitationMatcher", "CitationStore", "Metrics", "Pipeline", "RunManifest", "SINKS",
+    "extract_us_code_citations", "iter_citations", "load_corpus", "make_sink", "normalize_url",
+    "process_url", "save_to_excel",
+]
@@ -0,0 +1,133 @@
+"""Command line entry point: python -m extract_citations MANIFEST [MANIFEST ...]"""
+
+
+import argparse
+import asyncio
+import importlib.util
+import os
+
+from .corpus import load_corpus
+from .download import RANGE_PARTS, RANGE_THRESHOLD, SPILL_THRESHOLD, AsyncFetchEngine, PdfCache
+from .metrics import NULL_METRICS, Metrics
+from .pdf import PageTextCache, report_extraction_stats
+from .pipeline import PAGE_PARALLEL_THRESHOLD, Pipeline
+from .profiling import report_slowest
+from .sinks import PYARROW_FORMATS, SINKS, make_sink
+from .store import CitationStore, RunManifest
+
+
+def process_count(value):
+    """--processes N: a number of workers, 0 for one per core."""
+    try:
+        count = int(value)
+    except ValueError:
+        count = -1
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"expected a number of worker processes (0 for one per core), got {value!r}")
+    return count or os.cpu_count() or 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract U.S. Code, CFR and Executive Order citations from PDFs.")
+    parser.add_argument("manifests", nargs="*", metavar="MANIFEST",
+                        help="corpus manifests (.txt, .csv or .yaml) listing the PDF URLs; several "
+                             "are merged into one deduplicated run sharing pools and caches")
+    parser.add_argument("--processes", type=process_count, default=0, metavar="N",  # unset: parse in threads
+                        help="parse PDFs in a pool of N processes (0: one per core)")
+    parser.add_argument("--page-parallel-threshold", type=int, default=PAGE_PARALLEL_THRESHOLD,
+                        help="with --processes, split documents with more pages than this "
+                             "into page ranges parsed in parallel (0 disables)")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="keep downloaded PDFs in memory instead of temp files")
+    parser.add_argument("--spill-threshold", type=int, default=SPILL_THRESHOLD // (1024 * 1024),
+                        help="with --in-memory, write bodies larger than this many MiB to disk")
+    parser.add_argument("--range-parts", type=int, default=RANGE_PARTS,
+                        help="download large PDFs as this many parallel byte ranges when the server "
+                             "supports it (1 disables)")
+    parser.add_argument("--range-threshold", type=int, default=RANGE_THRESHOLD // (1024 * 1024),
+                        help="only use byte ranges for PDFs larger than this many MiB")
+    parser.add_argument("--cache-dir",
+                        help="keep downloaded PDFs here and revalidate them with conditional GETs")
+    parser.add_argument("--offline", action="store_true",
+                        help="serve every PDF from --cache-dir without touching the network")
+    parser.add_argument("--text-cache",
+                        help="SQLite file caching extracted page text across runs")
+    parser.add_argument("--format", choices=sorted(SINKS), default="xlsx",
+                        help="output format (parquet and arrow need pyarrow)")
+    parser.add_argument("--output",
+                        help="output file (default: extracted_citations.<format>)")
+    parser.add_argument("--store",
+                        help="SQLite file keeping citations across runs; the output file is exported from it")
+    parser.add_argument("--export", action="store_true",
+                        help="only export --store (limited to the MANIFEST URLs, if any) to the output file, "
+                             "without fetching")
+    parser.add_argument("--resume", action="store_true",
+                        help="with --store, skip URLs a previous run finished and retry failed ones after a backoff")
+    parser.add_argument("--metrics-json",
+                        help="write a JSON run report with per-document stage timings and counters here")
+    parser.add_argument("--metrics-prom",
+                        help="write the run totals here in the Prometheus text format "
+                             "(point node_exporter's textfile collector at its directory)")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="profile each document's parsing with cProfile, writing .pstats and collapsed-stack "
+                             "files here, and list the slowest documents")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="with --profile, also record the top allocation sites with tracemalloc (slow)")
+    parser.add_argument("--profile-top", type=int, default=10,
+                        help="slowest documents to list after a --profile run")
+    args = parser.parse_args(argv)
+    if args.offline and not args.cache_dir:
+        parser.error("--offline requires --cache-dir")
+    if args.export and not args.store:
+        parser.error("--export requires --store")
+    if args.resume and not args.store:
+        parser.error("--resume requires --store")
+    if args.profile_memory and not args.profile:
+        parser.error("--profile-memory requires --profile")
+    if not args.manifests and not args.export:
+        parser.error("at least one MANIFEST is required")
+    if any(os.path.splitext(path)[1].lower() in (".yaml", ".yml") for path in args.manifests) \
+            and importlib.util.find_spec("yaml") is None:
+        parser.error("YAML manifests require PyYAML (pip install pyyaml)")
+    if args.format in PYARROW_FORMATS and importlib.util.find_spec("pyarrow") is None:
+        parser.error(f"--format {args.format} requires pyarrow (pip install pyarrow)")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    urls = load_corpus(args.manifests)
+    store = CitationStore(args.store) if args.store else None
+    if args.export:
+        store.export(make_sink(args.format, args.output), urls or None)
+        return
+    metrics = Metrics() if args.metrics_json or args.metrics_prom else NULL_METRICS
+    cache = PdfCache(args.cache_dir, offline=args.offline) if args.cache_dir else None
+    engine = AsyncFetchEngine(in_memory=args.in_memory, spill_threshold=args.spill_threshold * 1024 * 1024,
+                              cache=cache, metrics=metrics, range_parts=args.range_parts,
+                              range_threshold=args.range_threshold * 1024 * 1024)
+    text_cache = PageTextCache(args.text_cache) if args.text_cache else None
+    manifest = RunManifest(args.store) if store else None
+    todo = manifest.start(urls, resume=args.resume) if manifest else urls
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+    # With a store the output is exported after the run, so its sink is only made (and
+    # an existing file truncated) then.
+    pipeline = Pipeline(engine, None if store else make_sink(args.format, args.output), processes=args.processes,
+                        page_threshold=args.page_parallel_threshold, text_cache=text_cache,
+                        store=store, manifest=manifest, metrics=metrics,
+                        profile_dir=args.profile, profile_memory=args.profile_memory)
+    asyncio.run(pipeline.run(todo))
+    if store:
+        store.export(make_sink(args.format, args.output), urls)
+        manifest.report()
+    engine.downloader.report()
+    report_extraction_stats()
+    if cache:
+        cache.report()
+    if args.profile:
+        report_slowest(args.profile, pipeline.profiled, args.profile_top)
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
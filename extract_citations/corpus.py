@@ -0,0 +1,71 @@
+"""Corpus manifests: the URL lists a run works through, one file per corpus under corpora/.
+
+A manifest is a text file with one URL per line, a CSV file with a "url"
+column (or URLs in its first column), or a YAML list of URLs (or a mapping
+with a "urls" list). Blank lines and lines starting with "#" are ignored.
+"""
+
+
+import csv
+import os
+from urllib.parse import quote, urlsplit, urlunsplit
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    """Canonical form used to spot duplicates: lowercase scheme and host, no default port,
+    percent-encoded path and query, no fragment."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if parts.port is not None and DEFAULT_PORTS.get(scheme) == parts.port:
+        netloc = netloc.rsplit(":", 1)[0]
+    path = quote(parts.path, safe="/%:@!$&'()*+,;=-._~") or "/"
+    query = quote(parts.query, safe="/%:@!$&'()*+,;=?-._~")
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def read_manifest(path):
+    """Returns the URLs listed in a .txt, .csv or .yaml/.yml manifest, as written."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".yaml", ".yml"):
+        return _read_yaml(path)
+    with open(path, newline="", encoding="utf-8") as f:
+        lines = [line for line in f if line.strip() and not line.lstrip().startswith("#")]
+    if extension == ".csv":
+        rows = [row for row in csv.reader(lines) if row]
+        header = [cell.strip().lower() for cell in rows[0]] if rows else []
+        if "url" in header:
+            column = header.index("url")
+            return [row[column].strip() for row in rows[1:] if len(row) > column and row[column].strip()]
+        return [row[0].strip() for row in rows if row[0].strip()]
+    return [line.strip() for line in lines]
+
+
+def _read_yaml(path):
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError(f"reading {path} requires PyYAML (pip install pyyaml)") from None
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or []
+    if isinstance(data, dict):
+        data = data.get("urls", [])
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of URLs or a mapping with a 'urls' list")
+    return [entry["url"] if isinstance(entry, dict) else str(entry) for entry in data]
+
+
+def load_corpus(paths):
+    """Reads every manifest and returns their normalized URLs, deduplicated in first-seen order."""
+    urls = {}
+    for path in paths:
+        listed = [normalize_url(url) for url in read_manifest(path)]
+        unique = list(dict.fromkeys(listed))
+        new = [url for url in unique if url not in urls]
+        urls.update(dict.fromkeys(new))
+        print(f"{path}: {len(listed)} URLs, {len(listed) - len(unique)} duplicates, "
+              f"{len(unique) - len(new)} already in an earlier manifest")
+    return list(urls)
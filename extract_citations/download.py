@@ -0,0 +1,829 @@
+"""Downloading: pooled HTTP sessions, per-host rate limits, the async fetch engine and the PDF cache."""
+
+
+import asyncio
+import collections
+import contextlib
+import email.utils
+import hashlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .metrics import NULL_METRICS
+
+
+POOL_SIZE = 10  # connections kept alive per host
+HOST_RATE = 1 / 3  # requests per second per host; replaces the old time.sleep(3)
+HOST_BURST = 1
+MAX_IN_FLIGHT = 8  # downloads running at once across all hosts
+MAX_FETCH_ATTEMPTS = 5
+CHUNK_SIZE = 256 * 1024
+THROTTLE_STATUSES = (429, 503)  # answered with Retry-After by polite servers
+RETRY_STATUSES = (500, 502, 503, 504)
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                    urllib3.exceptions.HTTPError)  # connection trouble and truncated bodies
+RETRY_RATIO = 0.2  # retries allowed per request sent, run-wide
+MIN_RETRIES = 10  # retries always allowed, so a short run still gets some
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0  # longest backoff before a single retry
+BREAKER_THRESHOLD = 5  # consecutive failures that open a host's circuit
+BREAKER_COOLDOWN = 120.0  # seconds an open circuit waits before letting one probe through
+BREAKER_MAX_OPENS = 3  # openings in a row before the host's remaining URLs are given up
+SPILL_THRESHOLD = 64 * 1024 * 1024  # in-memory mode spills larger bodies to a temp file
+# Parallel byte ranges per large download; 1 turns range downloads off. The extra
+# range requests go out together, outside the host's TokenBucket and circuit breaker,
+# so a host limited to one request per HOST_RATE interval briefly sees RANGE_PARTS at
+# once. They do count as requests sent, and range retries come out of the run-wide
+# retry budget.
+RANGE_PARTS = 4
+RANGE_THRESHOLD = 16 * 1024 * 1024  # bodies larger than this are fetched as ranges when the server allows
+RANGE_ATTEMPTS = 3  # tries per range before the whole download falls back to a single stream
+
+
+def get_browser_headers():
+    return {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/122.0.0.0 Safari/537.36"
+        ),
+        "Accept": "application/pdf",
+        "Connection": "keep-alive"
+    }
+
+
+class PooledDownloader:
+    """Long-lived HTTP session with per-host keep-alive connection pools."""
+
+    def __init__(self, pool_size=POOL_SIZE, retries=None):
+        self.session = requests.Session()
+        self.session.headers.update(get_browser_headers())
+        if retries is None:
+            retries = Retry(
+                total=5,
+                backoff_factor=5,
+                status_forcelist=[500, 502, 503, 504],
+                raise_on_status=False,
+            )
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", 60)
+        response = self.session.get(url, **kwargs)
+        # Keep a handle on the urllib3 pool so its counters survive pool eviction.
+        pool = getattr(response.raw, "_pool", None)
+        if pool is not None:
+            with self._lock:
+                self._pools.setdefault(urlsplit(url).netloc, set()).add(pool)
+        return response
+
+    def connection_stats(self):
+        """Returns {host: (connections_opened, requests_sent)}."""
+        stats = {}
+        with self._lock:
+            for host, pools in self._pools.items():
+                stats[host] = (
+                    sum(pool.num_connections for pool in pools),
+                    sum(pool.num_requests for pool in pools),
+                )
+        return stats
+
+    def report(self):
+        for host, (connections, sent) in sorted(self.connection_stats().items()):
+            print(f"{host}: {sent} requests over {connections} connections ({sent - connections} reused)")
+
+    def close(self):
+        self.session.close()
+
+
+_default_downloader = None
+_default_downloader_lock = threading.Lock()
+
+
+def get_downloader():
+    global _default_downloader
+    with _default_downloader_lock:
+        if _default_downloader is None:
+            _default_downloader = PooledDownloader()
+        return _default_downloader
+
+
+def write_to_tempfile(response, chunk_size=1024):
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            temp_file.write(chunk)
+    except BaseException:
+        temp_file.close()
+        os.remove(temp_file.name)
+        raise
+    temp_file.close()
+    return temp_file.name
+
+
+def read_body(response, spill_threshold=SPILL_THRESHOLD):
+    """Reads the whole body into one preallocated BytesIO buffer.
+
+    Bodies over `spill_threshold` bytes go to a temp file instead, which
+    open_pdf then memory-maps. Returns a BytesIO or a temp file path.
+    When Content-Length is given the buffer has one byte to spare, so the
+    read that finds the end of an exact body needs no growth; the buffer
+    only doubles for a body longer than announced.
+    """
+    length = int(response.headers.get("Content-Length") or 0)
+    if length > spill_threshold:
+        return write_to_tempfile(response, CHUNK_SIZE)
+    response.raw.decode_content = True
+    buffer = io.BytesIO()
+    size = 0
+    capacity = length + 1 if length else CHUNK_SIZE
+    while True:
+        if size == capacity:
+            if size >= spill_threshold:
+                return spill_to_tempfile(buffer, size, response)
+            capacity *= 2
+        buffer.seek(capacity - 1)
+        buffer.write(b"\0")  # grow to `capacity` once instead of once per chunk
+        with buffer.getbuffer() as view:
+            # urllib3 reads into a temporary copy as large as the slice, so keep slices to a chunk.
+            read = response.raw.readinto(view[size:min(capacity, size + CHUNK_SIZE)])
+        if not read:
+            break
+        size += read
+    buffer.truncate(size)
+    buffer.seek(0)
+    return buffer
+
+
+def spill_to_tempfile(buffer, size, response):
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+    try:
+        with buffer.getbuffer() as view:
+            temp_file.write(view[:size])
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            temp_file.write(chunk)
+    except BaseException:
+        temp_file.close()
+        os.remove(temp_file.name)
+        raise
+    temp_file.close()
+    return temp_file.name
+
+
+class RangeError(Exception):
+    """A byte range came back wrong (not a 206, the wrong Content-Range, or short)."""
+
+
+class RangeRefused(RangeError):
+    """The server answered a Range request with the whole body or a 416; retrying will not help."""
+
+
+def split_ranges(size, parts):
+    """Returns `parts` contiguous (start, end) byte ranges, ends inclusive, covering `size` bytes."""
+    step = -(-size // parts)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+
+class Preallocated:
+    """A document of `size` bytes reserved up front, as a BytesIO when `in_memory` or else a
+    temp file, which parallel byte ranges fill in at their own offsets."""
+
+    def __init__(self, size, in_memory):
+        if in_memory:
+            self.document = io.BytesIO()
+            self.document.seek(size - 1)
+            self.document.write(b"\0")
+        else:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+                temp_file.truncate(size)
+            self.document = temp_file.name
+
+    def fill(self, raw, start, length):
+        """Copies `length` bytes from a urllib3 response to offset `start`; raises RangeError
+        if the body ends first."""
+        with contextlib.ExitStack() as stack:
+            file = None
+            if not isinstance(self.document, io.BytesIO):
+                file = stack.enter_context(open(self.document, "r+b"))  # one handle per range
+                file.seek(start)
+            done = 0
+            while done < length:
+                data = raw.read(min(CHUNK_SIZE, length - done))
+                if not data:
+                    raise RangeError(f"connection closed after {done} of {length} bytes")
+                if file is None:
+                    with self.document.getbuffer() as view:
+                        view[start + done:start + done + len(data)] = data
+                else:
+                    file.write(data)
+                done += len(data)
+
+    def finish(self):
+        if isinstance(self.document, io.BytesIO):
+            self.document.seek(0)
+        return self.document
+
+    def discard(self):
+        release_document(self.document)
+
+
+class CachedPath(str):
+    """Path of a PdfCache blob; release_document leaves it in place."""
+
+
+def document_size(document):
+    if isinstance(document, io.BytesIO):
+        return document.getbuffer().nbytes
+    return os.path.getsize(document)
+
+
+def release_document(document):
+    """Deletes a temp file document; in-memory and cached documents are simply dropped."""
+    if isinstance(document, str) and not isinstance(document, CachedPath):
+        os.remove(document)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PdfCache:
+    """Persistent PDF cache: bodies stored under their SHA-256, validators kept per URL.
+
+    index.json maps each URL to the digest of its last body plus the ETag
+    and Last-Modified it was served with, so the next run can revalidate
+    with a conditional GET and pay only for a 304.
+    """
+
+    def __init__(self, cache_dir, offline=False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.hits = 0
+        self.revalidated = 0
+        self.stored = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            self.index = {}
+
+    def blob_path(self, digest):
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest + ".pdf")
+
+    def _entry(self, url):
+        with self._lock:
+            entry = self.index.get(url)
+        if entry and os.path.exists(self.blob_path(entry["sha256"])):
+            return entry
+        return None
+
+    def conditional_headers(self, url):
+        entry = self._entry(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load(self, url, in_memory=False, revalidated=False):
+        """Returns the cached document for `url`, or None on a miss."""
+        entry = self._entry(url)
+        if entry is None:
+            return None
+        path = self.blob_path(entry["sha256"])
+        with self._lock:
+            self.hits += 1
+            self.revalidated += revalidated
+        if in_memory:
+            with open(path, 'rb') as f:
+                return io.BytesIO(f.read())
+        return CachedPath(path)
+
+    def store(self, url, document, headers):
+        """Adds a fresh download to the cache; a temp file document is moved into it."""
+        if isinstance(document, io.BytesIO):
+            with document.getbuffer() as view:
+                digest = hashlib.sha256(view).hexdigest()
+                blob = self.blob_path(digest)
+                if not os.path.exists(blob):
+                    os.makedirs(os.path.dirname(blob), exist_ok=True)
+                    partial = f"{blob}.{threading.get_ident()}.part"
+                    with open(partial, 'wb') as f:
+                        f.write(view)
+                    os.replace(partial, blob)
+        else:
+            digest = file_sha256(document)
+            blob = self.blob_path(digest)
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            partial = f"{blob}.{threading.get_ident()}.part"
+            shutil.move(document, partial)
+            os.replace(partial, blob)
+            document = CachedPath(blob)
+        with self._lock:
+            self.stored += 1
+            self.index[url] = {
+                "sha256": digest,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+            }
+            self._save_index()
+        return document
+
+    def _save_index(self):
+        partial = self.index_path + ".part"
+        with open(partial, "w") as f:
+            json.dump(self.index, f, indent=1)
+        os.replace(partial, self.index_path)
+
+    def report(self):
+        print(f"PDF cache: {self.hits} served from cache ({self.revalidated} revalidated), "
+              f"{self.stored} downloaded")
+
+
+def record_failed_download(url, error):
+    print(f"Failed to download {url}: {error}")
+    with open("failed_downloads.txt", "a") as f:
+        f.write(url + "\n")
+
+
+def download_pdf(url, downloader=None):
+    downloader = downloader or get_downloader()
+    try:
+        response = downloader.get(url, stream=True)
+        response.raise_for_status()
+        temp_file = write_to_tempfile(response)
+        print(f"Downloaded {url}")
+        return temp_file
+    except Exception as e:
+        record_failed_download(url, e)
+        return None
+
+
+def parse_retry_after(value):
+    """Returns the Retry-After delay in seconds (delta-seconds or HTTP-date form)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Per-host politeness limit: `rate` requests per second, bursts of up to `burst`."""
+
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.not_before = 0.0
+        self._lock = asyncio.Lock()
+
+    def defer(self, seconds):
+        """Holds back every request to this host for `seconds` (e.g. Retry-After)."""
+        self.not_before = max(self.not_before, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.not_before:
+                    await asyncio.sleep(self.not_before - now)
+                    continue
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """Per-host circuit: opens after `threshold` consecutive failures, lets one probe
+    through after `cooldown` seconds, and closes again when a request succeeds.
+    A probe that ends any other way must be reported with failed(), which
+    opens the circuit again."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, max_opens=BREAKER_MAX_OPENS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_opens = max_opens
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opens = 0  # openings since the last success
+        self.opened_at = 0.0
+        self.reopen_after = cooldown
+
+    @property
+    def exhausted(self):
+        return self.opens >= self.max_opens
+
+    def reopens_in(self):
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reopen_after - time.monotonic())
+
+    def allow(self):
+        """True if a request may go out now; an open circuit past its cooldown admits one probe."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and not self.exhausted and self.reopens_in() == 0:
+            self.state = self.HALF_OPEN
+            return True
+        return False
+
+    def succeeded(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opens = 0
+
+    def failed(self, retry_after=None):
+        """Records a failure; returns True if it opened the circuit, for the server's
+        Retry-After when it sent one and otherwise for the cooldown."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+            self._open(self.cooldown if retry_after is None else retry_after)
+            return True
+        return False
+
+    def trip(self):
+        """Opens the circuit for the cooldown whatever the failure count; returns True if it was not open."""
+        if self.state == self.OPEN:
+            return False
+        self._open(self.cooldown)
+        return True
+
+    def _open(self, seconds):
+        self.state = self.OPEN
+        self.opens += 1
+        self.opened_at = time.monotonic()
+        self.reopen_after = seconds
+
+
+class RetryController:
+    """Decides whether and when failed requests are retried.
+
+    Retries come out of a run-wide budget of `min_retries` plus
+    `retry_ratio` per request sent, so an outage costs a bounded number of
+    extra requests rather than every URL's full attempts. Each retry waits
+    a jittered exponential backoff capped at `backoff_cap` (or the
+    server's Retry-After), and each host has a CircuitBreaker.
+    """
+
+    def __init__(self, retry_ratio=RETRY_RATIO, min_retries=MIN_RETRIES, backoff_base=BACKOFF_BASE,
+                 backoff_cap=BACKOFF_CAP, breaker_threshold=BREAKER_THRESHOLD,
+                 breaker_cooldown=BREAKER_COOLDOWN, breaker_max_opens=BREAKER_MAX_OPENS, seed=None):
+        self.retry_ratio = retry_ratio
+        self.min_retries = min_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.breaker_max_opens = breaker_max_opens
+        self.rng = random.Random(seed)
+        self.sent = 0
+        self.retried = 0
+        self.breakers = {}
+        self._lock = threading.Lock()  # range requests count from worker threads
+
+    def breaker(self, host):
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown,
+                                                 self.breaker_max_opens)
+        return self.breakers[host]
+
+    def request_sent(self):
+        with self._lock:
+            self.sent += 1
+
+    def take_retry(self):
+        """Spends one retry from the budget; False once it is used up."""
+        with self._lock:
+            if self.retried >= self.min_retries + self.retry_ratio * self.sent:
+                return False
+            self.retried += 1
+            return True
+
+    def backoff(self, attempt, retry_after=None):
+        """Seconds before retry number `attempt` (1-based): Retry-After when the server sent one,
+        otherwise "full jitter", uniform in [0, min(cap, base * 2 ** attempt)]. Either way
+        no more than `backoff_cap`."""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_cap)
+        return self.rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+
+class HostUnavailable(Exception):
+    """Raised by AsyncFetchEngine.fetch when the URL's host has an open circuit."""
+
+
+class AsyncFetchEngine:
+    """Downloads many URLs concurrently under per-host token buckets and a global in-flight cap.
+
+    The blocking session calls run in worker threads, so the event loop only
+    schedules. All retrying happens here rather than in urllib3, under the
+    `retry` RetryController: throttled responses (429, or 503 with
+    Retry-After) hold the whole host back for Retry-After, or open its
+    circuit when Retry-After is over the backoff cap; server errors,
+    dropped connections and truncated bodies back off only their own URL
+    and count against the host's circuit breaker. While a host's circuit is
+    open its URLs are moved to the end of the queue and other hosts keep
+    going. Download times, bytes, retries and cache hits go to `metrics`.
+
+    Bodies over `range_threshold` bytes from servers that send
+    "Accept-Ranges: bytes" are downloaded as `range_parts` parallel byte
+    ranges into one preallocated buffer. The decision uses the GET's own
+    headers, so small files cost no extra request, and that GET's stream
+    becomes the first range. Each range is checked (206, matching
+    Content-Range, full length) and retried on its own; if one still
+    fails, or the server ignores Range, the file is fetched again over a
+    single connection, whose errors are retried like any other GET's.
+    Range requests count as sent and their retries draw on the `retry`
+    budget, but they skip the host's token bucket and breaker (see
+    RANGE_PARTS).
+    """
+
+    def __init__(self, downloader=None, host_rate=HOST_RATE, host_burst=HOST_BURST,
+                 max_in_flight=MAX_IN_FLIGHT, max_attempts=MAX_FETCH_ATTEMPTS,
+                 in_memory=False, spill_threshold=SPILL_THRESHOLD, cache=None, metrics=NULL_METRICS,
+                 retry=None, range_parts=RANGE_PARTS, range_threshold=RANGE_THRESHOLD):
+        if downloader is None:
+            # No urllib3 retries: a backoff sleeping in a worker thread would hide the failure from the breaker.
+            downloader = PooledDownloader(retries=Retry(0, read=False))
+        self.downloader = downloader
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.max_attempts = max_attempts
+        self.max_in_flight = max_in_flight
+        self.in_memory = in_memory
+        self.spill_threshold = spill_threshold
+        self.cache = cache
+        self.metrics = metrics
+        self.retry = retry or RetryController()
+        self.range_parts = range_parts
+        self.range_threshold = range_threshold
+        self.attempts = collections.Counter()  # url -> requests sent, across deferrals
+        self.executor = None  # default executor unless the pipeline provides one
+        self.buckets = {}
+
+    def bucket(self, host):
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        return self.buckets[host]
+
+    def _fetch_document(self, url, ranges=True):
+        headers = self.cache.conditional_headers(url) if self.cache else {}
+        response = self.downloader.get(url, stream=True, headers=headers)
+        try:
+            if response.status_code in THROTTLE_STATUSES + RETRY_STATUSES:
+                return response.status_code, parse_retry_after(response.headers.get("Retry-After")), None
+            if response.status_code == 304 and headers:
+                document = self.cache.load(url, self.in_memory, revalidated=True)
+                if document is None:
+                    raise RuntimeError("server answered 304 but the cached copy is gone")
+                self.metrics.count("pdf_cache_hits")
+                return response.status_code, None, document
+            response.raise_for_status()
+            if ranges and self._ranges_worthwhile(response):
+                document = self._fetch_ranges(url, response)
+                if document is None:  # fetch it again over one connection, answered like any other GET
+                    response.close()
+                    self.retry.request_sent()
+                    return self._fetch_document(url, ranges=False)
+            else:
+                document = self._read_document(response)
+            if self.metrics.enabled:
+                self.metrics.count("bytes_downloaded", document_size(document))
+            if self.cache:
+                document = self.cache.store(url, document, response.headers)
+            return response.status_code, None, document
+        finally:
+            response.close()
+
+    def _read_document(self, response):
+        if self.in_memory:
+            return read_body(response, self.spill_threshold)
+        return write_to_tempfile(response, CHUNK_SIZE)
+
+    def _ranges_worthwhile(self, response):
+        headers = response.headers
+        return (self.range_parts > 1 and response.status_code == 200
+                and headers.get("Accept-Ranges", "").lower() == "bytes"
+                and headers.get("Content-Encoding", "identity").lower() == "identity"
+                and int(headers.get("Content-Length") or 0) > self.range_threshold)
+
+    def _fetch_ranges(self, url, response):
+        """Returns the document read as byte ranges, or None if it has to be fetched again whole."""
+        try:
+            document = self._read_ranges(url, response)
+        except (RangeError, *TRANSIENT_ERRORS) as e:
+            print(f"Range download of {url} failed ({e}); falling back to a single connection")
+            self.metrics.count("range_fallbacks")
+            return None
+        self.metrics.count("range_downloads")
+        return document
+
+    def _read_ranges(self, url, response):
+        """Reads the first range from the open GET and the others over parallel Range requests."""
+        size = int(response.headers["Content-Length"])
+        validator = response.headers.get("ETag")
+        if not validator or validator.startswith("W/"):  # If-Range needs a strong validator
+            validator = response.headers.get("Last-Modified")
+        ranges = split_ranges(size, self.range_parts)
+        target = Preallocated(size, self.in_memory and size <= self.spill_threshold)
+        response.raw.decode_content = False
+        try:
+            with ThreadPoolExecutor(len(ranges) - 1, "range") as pool:
+                parts = [pool.submit(self._fetch_range, url, target, start, end, size, validator)
+                         for start, end in ranges[1:]]
+                first_start, first_end = ranges[0]
+                target.fill(response.raw, first_start, first_end - first_start + 1)
+                response.close()  # drops the rest of the first stream with its connection
+                for part in parts:
+                    part.result()
+        except BaseException:
+            target.discard()
+            raise
+        return target.finish()
+
+    def _fetch_range(self, url, target, start, end, size, validator):
+        headers = {"Range": f"bytes={start}-{end}"}
+        if validator:
+            headers["If-Range"] = validator
+        expected = f"bytes {start}-{end}/{size}"
+        error = None
+        for attempt in range(RANGE_ATTEMPTS):
+            if attempt:
+                if not self.retry.take_retry():
+                    raise RangeError(f"bytes {start}-{end} failed ({error}); run-wide retry budget exhausted")
+                self.metrics.count("range_retries")
+            self.retry.request_sent()
+            self.metrics.count("range_requests")
+            try:
+                with self.downloader.get(url, stream=True, headers=headers) as response:
+                    if response.status_code in (200, 416):  # the file changed, or Range is not really supported
+                        raise RangeRefused(f"HTTP {response.status_code} for bytes {start}-{end}")
+                    if response.status_code != 206:
+                        raise RangeError(f"HTTP {response.status_code} for bytes {start}-{end}")
+                    if response.headers.get("Content-Range") != expected:
+                        raise RangeError(f"asked for {expected}, got {response.headers.get('Content-Range')}")
+                    response.raw.decode_content = False
+                    target.fill(response.raw, start, end - start + 1)
+                    return
+            except RangeRefused:
+                raise
+            except (RangeError, *TRANSIENT_ERRORS) as e:
+                error = e
+        raise RangeError(f"bytes {start}-{end} failed {RANGE_ATTEMPTS} times, last with: {error}")
+
+    async def fetch(self, url, in_flight):
+        if self.cache and self.cache.offline:
+            document = self.cache.load(url, self.in_memory)
+            if document is None:
+                record_failed_download(url, "not in the PDF cache (offline mode)")
+                self.metrics.count("download_failures")
+            else:
+                self.metrics.count("pdf_cache_hits")
+            return document
+        host = urlsplit(url).netloc
+        bucket = self.bucket(host)
+        breaker = self.retry.breaker(host)
+        probing = False
+        try:
+            while True:
+                if breaker.exhausted:
+                    return self._failed(url, f"{host} kept failing; circuit opened {breaker.opens} times")
+                if not breaker.allow():
+                    raise HostUnavailable(host)
+                probing = breaker.state == breaker.HALF_OPEN
+                await bucket.acquire()
+                self.attempts[url] += 1
+                self.retry.request_sent()
+                try:
+                    async with in_flight:
+                        with self.metrics.timer("download", url):
+                            status, retry_after, document = await asyncio.get_running_loop().run_in_executor(
+                                self.executor, self._fetch_document, url)
+                except TRANSIENT_ERRORS as e:
+                    status, retry_after, document, error = None, None, None, e
+                except Exception as e:
+                    breaker.succeeded()  # the host answered; the URL itself is bad
+                    return self._failed(url, e)
+                if document is not None:
+                    breaker.succeeded()
+                    print(f"Downloaded {url}")
+                    self.metrics.count("documents_fetched")
+                    return document
+
+                attempt = self.attempts[url]
+                throttled = status == 429 or (status in THROTTLE_STATUSES and retry_after is not None)
+                if status is not None:
+                    error = f"HTTP {status}"
+                if retry_after is not None and retry_after > self.retry.backoff_cap:
+                    # Longer than any single backoff: shut the host off for its cooldown and defer
+                    # its URLs rather than sleep that long.
+                    self.metrics.count("retry_after_over_cap")
+                    if breaker.trip():
+                        print(f"Circuit for {host} opened: Retry-After {retry_after:.0f}s is over "
+                              f"the {self.retry.backoff_cap:.0f}s backoff cap")
+                        self.metrics.count("breaker_opened")
+                    if attempt >= self.max_attempts:
+                        return self._failed(url, f"{error} after {attempt} attempts")
+                    continue
+                # A throttled probe re-opens the circuit too, for Retry-After, or no probe would ever follow.
+                if (probing or not throttled) and breaker.failed(retry_after):
+                    print(f"Circuit for {host} opened after {breaker.failures} consecutive failures")
+                    self.metrics.count("breaker_opened")
+                if attempt >= self.max_attempts:
+                    return self._failed(url, f"{error} after {attempt} attempts")
+                if not self.retry.take_retry():
+                    self.metrics.count("retry_budget_exhausted")
+                    return self._failed(url, f"{error}; run-wide retry budget exhausted")
+                delay = self.retry.backoff(attempt, retry_after if throttled else None)
+                if throttled:
+                    bucket.defer(delay)  # Retry-After applies to the whole host
+                    self.metrics.count("throttle_retries")
+                else:
+                    self.metrics.count("error_retries")
+                    await asyncio.sleep(delay)
+        finally:
+            if probing and breaker.state == breaker.HALF_OPEN:  # the probe was cancelled before an answer
+                breaker.failed()
+
+    def _failed(self, url, error):
+        record_failed_download(url, error)
+        self.metrics.count("download_failures")
+        return None
+
+    async def fetch_into(self, urls, queue, on_fetched=None):
+        """Puts (url, document or None) on `queue` as downloads finish.
+
+        Only max_in_flight URLs are taken at a time, so a full queue stops new
+        downloads instead of piling temp files up on disk. `on_fetched(url,
+        document)` is called for each one first, when given. URLs whose host
+        has an open circuit are set aside and tried again in another pass once
+        every other URL has been through, after the earliest cooldown ends.
+        """
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        todo = list(urls)
+        while todo:
+            pending = iter(todo)
+            deferred = []
+
+            async def worker():
+                for url in pending:
+                    try:
+                        document = await self.fetch(url, in_flight)
+                    except HostUnavailable:
+                        deferred.append(url)
+                        continue
+                    if on_fetched is not None:
+                        on_fetched(url, document)
+                    await queue.put((url, document))
+
+            await asyncio.gather(*(worker() for _ in range(self.max_in_flight)))
+            if deferred:
+                hosts = sorted({urlsplit(url).netloc for url in deferred})
+                breakers = [self.retry.breaker(host) for host in hosts]
+                for breaker in breakers:
+                    if breaker.state == breaker.HALF_OPEN:  # nothing is in flight, so its probe was lost
+                        breaker.failed()
+                wait = min(breaker.reopens_in() for breaker in breakers)
+                print(f"Deferred {len(deferred)} URLs for {', '.join(hosts)}; retrying in {wait:.0f}s")
+                self.metrics.count("urls_deferred", len(deferred))
+                await asyncio.sleep(wait)
+            todo = deferred
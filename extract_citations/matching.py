@@ -0,0 +1,239 @@
+"""Citation matching and section inference over extracted page text."""
+
+
+import bisect
+import collections
+import hashlib
+import re
+import time
+
+
+def sanitize_text(text):
+    return re.sub(r"[\r\n]+", " ", text).strip()
+
+
+def extract_toc(pages):
+    return toc_from_texts(pages.texts(0, 10))
+
+
+def toc_from_texts(page_texts):
+    toc = []
+    toc_pattern = r"(?P<heading>.+?)\s+(\d+)"
+    for text in page_texts:
+        if text and "Table of Contents" in text:
+            matches = re.findall(toc_pattern, text)
+            for match in matches:
+                heading = sanitize_text(match[0])
+                page_start = int(match[1])
+                toc.append((heading, page_start))
+    return toc
+
+
+class TocIndex:
+    """A document's TOC as a sorted interval index over section start pages.
+
+    Built once per document; each lookup is a bisect instead of a scan of
+    the whole TOC, and out-of-order TOC entries no longer confuse it.
+    """
+
+    def __init__(self, toc):
+        entries = sorted(toc, key=lambda entry: entry[1])  # stable, so equal starts keep TOC order
+        self.starts = [start_page for _, start_page in entries]
+        self.sections = [section for section, _ in entries]
+
+    def __bool__(self):
+        return bool(self.starts)
+
+    def section_for(self, page_num):
+        """Returns the section whose range contains `page_num`, or None before the first one."""
+        i = bisect.bisect_right(self.starts, page_num) - 1
+        return self.sections[i] if i >= 0 else None
+
+
+class PageHeadings:
+    """Candidate heading lines of one page, indexed by the offset where each one ends.
+
+    The index is built on the first lookup, so pages whose sections all
+    come from the TOC never split their text into lines.
+    """
+
+    def __init__(self, page_text):
+        self.page_text = page_text
+        self.ends = None
+        self.lines = None
+
+    def _build(self):
+        self.ends, self.lines = [], []
+        offset = 0
+        for line in self.page_text.splitlines(keepends=True):
+            stripped = line.strip()
+            if stripped:
+                self.ends.append(offset + len(line.rstrip()))
+                self.lines.append(stripped)
+            offset += len(line)
+
+    def heading_before(self, offset):
+        """Returns the last non-empty line that ends at or before `offset`, or None."""
+        if self.ends is None:
+            self._build()
+        i = bisect.bisect_right(self.ends, offset) - 1
+        return sanitize_text(self.lines[i]) if i >= 0 else None
+
+
+def infer_section_name(toc, page_num, headings, offset):
+    """`toc` is the document's TocIndex, `headings` the page's PageHeadings and
+    `offset` where the citation's context starts on the page."""
+    section = toc.section_for(page_num) if toc else None
+    if section is not None:
+        return section
+    section = headings.heading_before(offset)
+    return section if section is not None else "Unknown Section"
+
+
+Citation = collections.namedtuple("Citation", "citation kind title section subsection start end")
+
+
+class CitationMatcher:
+    """Finds U.S. Code, CFR and Executive Order citations with one compiled pattern.
+
+    Every alternative uses named groups, so a single match yields the
+    normalized citation ("5 USC 552a", "7 CFR 1900.5", "Executive Order
+    13556", "EO 12344") and its fields without a second regex pass.
+    Subsections such as "(b)(1)" are captured in a lookahead, which keeps
+    the matched span, and therefore the context, the same as before.
+
+    Before the pattern runs, a page is probed for the literal tokens that
+    every citation contains. Pages without any are skipped outright; on
+    the rest, only a few non-blank lines around each hit are handed to the
+    pattern, along with any blank lines between them, since the pattern's
+    whitespace runs across line breaks.
+    """
+
+    PATTERN = re.compile(
+        r"\b(?P<usc_title>\d+)\s*(?:U\.S\.C\.|USC|U\.S\. Code)\s*\u00a7?\s*"
+        r"(?P<usc_section>\d+(?:\.\d+)*[a-zA-Z0-9]*)(?=(?P<usc_sub>(?:\([a-zA-Z0-9]+\))*))|"
+        r"\b(?P<cfr_title>\d+)\s*(?:C\.F\.R\.|CFR|Code of Federal Regulations)\s*\u00a7?\s*"
+        r"(?P<cfr_section>\d+(?:\.\d+)*[a-zA-Z0-9]*)(?=(?P<cfr_sub>(?:\([a-zA-Z0-9]+\))*))|"
+        r"(?:E\.O\.|Executive\s*Order)\s*(?P<eo_number>\d+)|"
+        r"\bEO\s+(?P<eo_short>\d+)\b",
+        re.IGNORECASE,
+    )
+
+    # Every possible match contains one of these once casefolded (as
+    # re.IGNORECASE compares); "eo" + whitespace is probed separately.
+    PROBES = ("u.s.", "usc", "cfr", "c.f.r.", "code of federal", "e.o.", "order")
+    EO_PROBE = re.compile(r"eo\s")
+    WINDOW_LINES = 2  # non-blank lines kept on either side of a probe hit
+
+    def __init__(self, pattern=PATTERN, prefilter=True):
+        self.pattern = pattern
+        self.prefilter = prefilter
+
+    def finditer(self, text, stats=None):
+        """Yields a Citation for every match in `text`; counts pages skipped/scanned into `stats`."""
+        if not self.prefilter:
+            yield from self._finditer(text, [(0, len(text))])
+            return
+        folded = text.casefold()
+        hits = [match.start() for match in self.EO_PROBE.finditer(folded)]
+        for probe in self.PROBES:
+            hit = folded.find(probe)
+            while hit != -1:
+                hits.append(hit)
+                hit = folded.find(probe, hit + len(probe))
+        if not hits:
+            if stats is not None:
+                stats["pages_skipped"] += 1
+            return
+        if len(folded) == len(text):
+            windows = self._windows(text, sorted(hits))
+        else:  # casefolding changed offsets; scan the whole page
+            windows = [(0, len(text))]
+        if stats is not None:
+            stats["pages_scanned"] += 1
+            stats["prefilter_windows"] += len(windows)
+        yield from self._finditer(text, windows)
+
+    def _windows(self, text, hits):
+        windows = []
+        for hit in hits:
+            start = text.rfind("\n", 0, hit) + 1
+            end = text.find("\n", hit)
+            if end == -1:
+                end = len(text)
+            before = after = 0
+            while start and before < self.WINDOW_LINES:
+                previous = text.rfind("\n", 0, start - 1) + 1
+                before += bool(text[previous:start - 1].strip())
+                start = previous
+            while end < len(text) and after < self.WINDOW_LINES:
+                following = text.find("\n", end + 1)
+                if following == -1:
+                    following = len(text)
+                after += bool(text[end + 1:following].strip())
+                end = following
+            if windows and start <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+            else:
+                windows.append((start, end))
+        return windows
+
+    def _finditer(self, text, windows):
+        last_end = 0
+        for start, end in windows:
+            for match in self.pattern.finditer(text, max(start, last_end), end):
+                last_end = match.end()
+                yield self.citation(match)
+
+    @staticmethod
+    def citation(match):
+        kind = match.lastgroup  # the lookahead or number group closing the matched alternative
+        start, end = match.span()
+        if kind == "usc_sub":
+            title, section, subsection = match.group("usc_title", "usc_section", "usc_sub")
+            return Citation(f"{title} USC {section}", "USC", title, section, subsection, start, end)
+        if kind == "cfr_sub":
+            title, section, subsection = match.group("cfr_title", "cfr_section", "cfr_sub")
+            return Citation(f"{title} CFR {section}", "CFR", title, section, subsection, start, end)
+        if kind == "eo_number":
+            number = match.group("eo_number")
+            return Citation(f"Executive Order {number}", "EO", None, number, "", start, end)
+        number = match.group("eo_short")
+        return Citation(f"EO {number}", "EO", None, number, "", start, end)
+
+
+CITATION_MATCHER = CitationMatcher()
+# Bump the prefix when normalization or section inference changes; pattern edits change the hash.
+MATCHER_VERSION = "1/" + hashlib.sha256(CitationMatcher.PATTERN.pattern.encode()).hexdigest()[:12]
+
+
+def iter_citations(toc, pages, stats=None, timed=False):
+    """Yields (citation, page_number, section_name, context, offset) for every match,
+    where offset is the match's character position on the page.
+
+    `pages` is a list of page texts or a PageTextProvider; prefilter
+    counters are added to the `stats` Counter when one is given, and with
+    `timed` so is the time spent in infer_section_name, as "seconds_sections".
+    """
+    toc = TocIndex(toc)
+    for page_num in range(len(pages)):
+        text = pages[page_num]
+        if text:
+            headings = PageHeadings(text)
+            for citation in CITATION_MATCHER.finditer(text, stats):
+                start, end = citation.start, citation.end
+                context_start = max(0, start - 100)
+                context = sanitize_text(text[context_start:min(len(text), end + 100)])
+                if timed:
+                    started = time.perf_counter()
+                    section_name = infer_section_name(toc, page_num + 1, headings, context_start)
+                    stats["seconds_sections"] += time.perf_counter() - started
+                else:
+                    section_name = infer_section_name(toc, page_num + 1, headings, context_start)
+                yield citation.citation, page_num + 1, section_name, context, start
+
+
+def expand_citations(url, batch):
+    """Turns compact (citation, page, section, context, offset) tuples into output rows."""
+    return [(citation, f"{url}#page={page}", section_name, context, url)
+            for citation, page, section_name, context, _ in batch]
@@ -0,0 +1,148 @@
+"""Run metrics: per-document stage timings and counters, written as a JSON run report
+and a Prometheus textfile-collector file.
+
+Metrics are off unless a report is asked for; the pipeline then uses
+NULL_METRICS, whose methods do nothing, and the workers skip their timers.
+"""
+
+
+import collections
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+
+
+TIMING_PREFIX = "seconds_"  # stats keys carrying stage timings back from pool workers
+PROMETHEUS_PREFIX = "extract_citations"
+
+
+class Metrics:
+    """Stage timers and counters for one run; safe to share between threads.
+
+    Stages are timed per document: `documents` maps each URL to its
+    seconds per stage, and `stages` keeps the run-wide totals. Workers in
+    other processes cannot reach this object, so they put their timings in
+    the stats Counter they already return, under "seconds_<stage>" keys,
+    and the writer hands that Counter to record().
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters = collections.Counter()
+        self.stages = {}  # stage -> [documents, total seconds, max seconds]
+        self.documents = collections.defaultdict(dict)  # url -> {stage: seconds}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def timer(self, stage, url=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, url)
+
+    def observe(self, stage, seconds, url=None):
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+            if url is not None:
+                self.documents[url][stage] = self.documents[url].get(stage, 0.0) + seconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def record(self, url, stats):
+        """Moves the "seconds_<stage>" timings out of a worker's `stats` Counter into the
+        stage timers and adds the rest of it to the counters."""
+        for key in [key for key in stats if key.startswith(TIMING_PREFIX)]:
+            self.observe(key[len(TIMING_PREFIX):], stats.pop(key), url)
+        with self._lock:
+            self.counters.update(stats)
+
+    def report(self):
+        finished = time.time()
+        with self._lock:
+            stages = {
+                stage: {"documents": documents, "total_seconds": round(total, 6),
+                        "mean_seconds": round(total / documents, 6), "max_seconds": round(longest, 6)}
+                for stage, (documents, total, longest) in sorted(self.stages.items())
+            }
+            return {
+                "started": _timestamp(self.started),
+                "finished": _timestamp(finished),
+                "elapsed_seconds": round(finished - self.started, 3),
+                "counters": dict(sorted(self.counters.items())),
+                "stages": stages,
+                "documents": {url: {stage: round(seconds, 6) for stage, seconds in timings.items()}
+                              for url, timings in self.documents.items()},
+            }
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.report(), indent=2) + "\n")
+        print(f"Saved run report to {path}")
+
+    def write_prometheus(self, path):
+        """Writes the run totals in the Prometheus text format, for node_exporter's textfile collector."""
+        report = self.report()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+            lines.extend(f"{PROMETHEUS_PREFIX}_{name}{labels} {value}" for labels, value in samples)
+
+        stages = report["stages"]
+        metric("stage_seconds_total", "counter", "Time spent in each pipeline stage.",
+               [(f'{{stage="{stage}"}}', entry["total_seconds"]) for stage, entry in stages.items()])
+        metric("stage_documents_total", "counter", "Documents timed in each pipeline stage.",
+               [(f'{{stage="{stage}"}}', entry["documents"]) for stage, entry in stages.items()])
+        metric("stage_max_seconds", "gauge", "Slowest single document in each pipeline stage.",
+               [(f'{{stage="{stage}"}}', entry["max_seconds"]) for stage, entry in stages.items()])
+        for name, value in report["counters"].items():
+            metric(f"{name}_total", "counter", f"Run total of {name.replace('_', ' ')}.", [("", value)])
+        metric("run_duration_seconds", "gauge", "Wall time of the last run.", [("", report["elapsed_seconds"])])
+        metric("run_finished_timestamp_seconds", "gauge", "When the last run finished.", [("", time.time())])
+        _write_atomic(path, "\n".join(lines) + "\n")
+        print(f"Saved Prometheus metrics to {path}")
+
+
+class NullMetrics:
+    """Stands in for Metrics when no report was asked for; every call is a no-op."""
+
+    enabled = False
+    _timer = contextlib.nullcontext()
+
+    def timer(self, stage, url=None):
+        return self._timer
+
+    def observe(self, stage, seconds, url=None):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def record(self, url, stats):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def _timestamp(seconds):
+    return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+def _write_atomic(path, text):
+    """The textfile collector may read at any moment, so never leave a half-written file."""
+    partial = path + ".part"
+    with open(partial, "w") as f:
+        f.write(text)
+    os.replace(partial, path)
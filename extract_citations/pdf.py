@@ -0,0 +1,212 @@
+"""PDF page text: lazy per-page extraction, the page-text cache and run-wide extraction stats."""
+
+
+import collections
+import contextlib
+import hashlib
+import io
+import mmap
+import os
+import sqlite3
+import threading
+import zlib
+
+import PyPDF2
+
+from .download import CachedPath, file_sha256
+from .matching import extract_toc
+
+
+EXTRACTOR_VERSION = f"PyPDF2-{PyPDF2.__version__}/1"  # bump when page text extraction changes
+
+
+class PageTextProvider:
+    """Per-document page text source that runs extract_text() at most once per page.
+
+    TOC detection, citation matching and section inference all read
+    through it; `memo_hits` counts the extractions the memo saved.
+    """
+
+    def __init__(self, reader=None, page_texts=None, extracted=False):
+        self.reader = reader
+        self._seen = set()
+        self.cached = 0
+        self.extracted = 0
+        self.memo_hits = 0
+        if page_texts is None:
+            self._texts = [None] * len(reader.pages)
+        elif extracted:  # texts extracted elsewhere during this run
+            self._texts = list(page_texts)
+            self._seen.update(range(len(self._texts)))
+            self.extracted = len(self._texts)
+        else:  # texts loaded from the PageTextCache
+            self._texts = list(page_texts)
+            self.cached = len(self._texts)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __getitem__(self, page_num):
+        text = self._texts[page_num]
+        if text is None:
+            text = self._texts[page_num] = self.reader.pages[page_num].extract_text()
+            self.extracted += 1
+        elif page_num in self._seen:
+            self.memo_hits += 1
+        self._seen.add(page_num)
+        return text
+
+    def texts(self, start=0, stop=None):
+        stop = len(self) if stop is None else min(stop, len(self))
+        return [self[page_num] for page_num in range(start, stop)]
+
+    def stats(self):
+        return collections.Counter(pages_extracted=self.extracted, pages_from_text_cache=self.cached,
+                                   extractions_saved=self.memo_hits)
+
+
+extraction_stats = collections.Counter()
+_extraction_stats_lock = threading.Lock()
+
+
+def record_extraction_stats(stats):
+    with _extraction_stats_lock:
+        extraction_stats.update(stats)
+
+
+def report_extraction_stats():
+    print(f"Page text: {extraction_stats['pages_extracted']} pages extracted, "
+          f"{extraction_stats['pages_from_text_cache']} from the text cache, "
+          f"{extraction_stats['extractions_saved']} repeat extractions saved")
+    print(f"Prefilter: {extraction_stats['pages_skipped']} pages skipped, "
+          f"{extraction_stats['pages_scanned']} scanned in {extraction_stats['prefilter_windows']} windows")
+    print(f"Documents: {extraction_stats['documents_extracted']} extracted, "
+          f"{extraction_stats['documents_reused']} unchanged and reused from the store")
+
+
+@contextlib.contextmanager
+def open_pdf(document):
+    """Opens a document given as a path (memory-mapped), bytes or a BytesIO."""
+    if isinstance(document, io.BytesIO):
+        document.seek(0)
+        yield document
+    elif isinstance(document, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(document)
+    else:
+        with open(document, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def document_sha256(document):
+    if isinstance(document, CachedPath):
+        return os.path.splitext(os.path.basename(document))[0]  # blobs are named by digest
+    if isinstance(document, str):
+        return file_sha256(document)
+    if isinstance(document, io.BytesIO):
+        with document.getbuffer() as view:
+            return hashlib.sha256(view).hexdigest()
+    return hashlib.sha256(document).hexdigest()
+
+
+class PageTextCache:
+    """SQLite store of zlib-compressed page texts keyed by document SHA-256,
+    page number and EXTRACTOR_VERSION.
+
+    Safe to share between threads (one connection each) and processes (it
+    pickles as its path); WAL mode lets readers and writers overlap.
+    """
+
+    def __init__(self, path, extractor=EXTRACTOR_VERSION):
+        self.path = path
+        self.extractor = extractor
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "document TEXT NOT NULL, extractor TEXT NOT NULL, pages INTEGER NOT NULL, "
+                "PRIMARY KEY (document, extractor)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS page_text ("
+                "document TEXT NOT NULL, extractor TEXT NOT NULL, page INTEGER NOT NULL, text BLOB NOT NULL, "
+                "PRIMARY KEY (document, extractor, page)) WITHOUT ROWID"
+            )
+
+    def __getstate__(self):
+        return {"path": self.path, "extractor": self.extractor}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, digest, start=0, stop=None):
+        """Returns the texts of pages [start, stop), or None unless every one is cached."""
+        conn = self._connection()
+        row = conn.execute("SELECT pages FROM documents WHERE document = ? AND extractor = ?",
+                           (digest, self.extractor)).fetchone()
+        if row is None:
+            return None
+        stop = row[0] if stop is None else min(stop, row[0])
+        rows = conn.execute(
+            "SELECT text FROM page_text WHERE document = ? AND extractor = ? AND page >= ? AND page < ? "
+            "ORDER BY page", (digest, self.extractor, start, stop)).fetchall()
+        if len(rows) != stop - start:
+            return None
+        return [zlib.decompress(text).decode("utf-8", "surrogatepass") for text, in rows]
+
+    def put(self, digest, num_pages, page_texts, start=0):
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?)", (digest, self.extractor, num_pages))
+            conn.executemany(
+                "INSERT OR REPLACE INTO page_text VALUES (?, ?, ?, ?)",
+                ((digest, self.extractor, start + offset, zlib.compress((text or "").encode("utf-8", "surrogatepass")))
+                 for offset, text in enumerate(page_texts)),
+            )
+
+
+class TooManyPages(Exception):
+    """Raised by load_pages for a document longer than `max_pages`; `pages` is its page count."""
+
+    def __init__(self, pages):
+        super().__init__(f"{pages} pages")
+        self.pages = pages
+
+
+def load_pages(document, text_cache=None, digest=None, max_pages=0):
+    """Returns (toc, pages) where pages is a fully extracted PageTextProvider.
+
+    With a PageTextCache, a document whose pages are all cached is not
+    opened at all. With `max_pages`, any other document with more pages
+    raises TooManyPages before a page is extracted.
+    """
+    if text_cache is not None:
+        digest = digest or document_sha256(document)
+        page_texts = text_cache.get(digest)
+        if page_texts is not None:
+            pages = PageTextProvider(page_texts=page_texts)
+            return extract_toc(pages), pages
+    with open_pdf(document) as file:
+        reader = PyPDF2.PdfReader(file)
+        if max_pages and len(reader.pages) > max_pages:
+            raise TooManyPages(len(reader.pages))
+        pages = PageTextProvider(reader)
+        toc = extract_toc(pages)
+        page_texts = pages.texts()
+        pages.reader = None  # the file is closed from here on
+    if text_cache is not None:
+        text_cache.put(digest, len(page_texts), page_texts)
+    return toc, pages
+
+
+def extract_pages(document, text_cache=None, digest=None):
+    """Returns (toc, page_texts) for a PDF path or in-memory document."""
+    toc, pages = load_pages(document, text_cache, digest)
+    record_extraction_stats(pages.stats())
+    return toc, pages.texts()
@@ -0,0 +1,399 @@
+"""The fetch -> extract -> match -> write pipeline and the worker tasks it schedules."""
+
+
+import asyncio
+import collections
+import contextlib
+import functools
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2
+
+from .download import download_pdf, release_document
+from .matching import expand_citations, extract_toc, iter_citations
+from .metrics import NULL_METRICS
+from .pdf import (PageTextProvider, TooManyPages, document_sha256, extract_pages, load_pages, open_pdf,
+                  record_extraction_stats)
+from .profiling import profile_task
+from .store import RunManifest
+
+
+EXTRACT_WORKERS = 2
+MATCH_WORKERS = 2
+QUEUE_SIZE = 4  # documents buffered between pipeline stages
+MAX_TASKS_PER_CHILD = 50  # recycle parser processes to cap memory leaked by PyPDF2
+PAGE_PARALLEL_THRESHOLD = 200  # split documents longer than this across processes
+PAGE_RANGE_SIZE = 50
+
+
+def match_citations(toc, page_texts, url):
+    stats = collections.Counter()
+    citations = expand_citations(url, iter_citations(toc, page_texts, stats))
+    record_extraction_stats(stats)
+    return citations
+
+
+def extract_us_code_citations(pdf_path, url, text_cache=None):
+    try:
+        toc, page_texts = extract_pages(pdf_path, text_cache)
+        return match_citations(toc, page_texts, url)
+    except Exception as e:
+        print(f"Error processing {pdf_path}: {e}")
+        return []
+
+
+def process_url(url, downloader=None):
+    temp_file = download_pdf(url, downloader)
+    if not temp_file:
+        return []
+    return parse_and_remove(temp_file, url)
+
+
+def parse_and_remove(temp_file, url):
+    try:
+        return extract_us_code_citations(temp_file, url)
+    finally:
+        os.remove(temp_file)
+
+
+_DONE = object()
+
+
+def collect_citations(toc, pages, stats, timed=False):
+    """Matches every page into a list; with `timed`, adds "seconds_match" and "seconds_sections" to `stats`."""
+    if not timed:
+        return list(iter_citations(toc, pages, stats))
+    started = time.perf_counter()
+    batch = list(iter_citations(toc, pages, stats, timed=True))
+    stats["seconds_match"] += time.perf_counter() - started - stats["seconds_sections"]
+    return batch
+
+
+def extract_stage(url, document, text_cache=None, digest=None, timed=False):
+    if document is None:
+        return None
+    started = time.perf_counter()
+    try:
+        toc, pages = load_pages(document, text_cache, digest)
+    except Exception as e:
+        print(f"Error processing {url}: {e}")
+        return None
+    finally:
+        release_document(document)
+    stats = pages.stats()  # the writer records these, as for parse_document
+    page_texts = pages.texts()
+    if timed:
+        stats["seconds_extract"] = time.perf_counter() - started
+    return url, toc, page_texts, stats
+
+
+def match_stage(url, toc, page_texts, stats, timed=False):
+    stats["pages"] = len(page_texts)
+    return url, collect_citations(toc, page_texts, stats, timed), stats
+
+
+def parse_document(url, document, text_cache=None, digest=None, timed=False, page_threshold=0):
+    """Process-pool task: extract and match one PDF in a single hop.
+
+    Page texts never leave the worker; only the compact citation batch
+    (without the URL repeated on every row) is pickled back. A document
+    longer than `page_threshold` pages whose text is not cached is left
+    unparsed and unreleased for the caller to split into page ranges; the
+    result is then (url, None, page count).
+    """
+    if document is None:
+        return None
+    started = time.perf_counter()
+    try:
+        toc, pages = load_pages(document, text_cache, digest, page_threshold)
+    except TooManyPages as e:
+        return url, None, e.pages
+    except Exception as e:
+        print(f"Error processing {url}: {e}")
+        release_document(document)
+        return None
+    release_document(document)
+    stats = pages.stats()
+    stats["pages"] = len(pages)
+    if timed:
+        stats["seconds_extract"] = time.perf_counter() - started
+    return url, collect_citations(toc, pages, stats, timed), stats
+
+
+def extract_page_range(document, start, stop, text_cache=None, digest=None):
+    """Process-pool task: opens the PDF independently and extracts pages [start, stop)."""
+    if text_cache is not None:
+        page_texts = text_cache.get(digest, start, stop)
+        if page_texts is not None:
+            return page_texts
+    with open_pdf(document) as file:
+        reader = PyPDF2.PdfReader(file)
+        page_texts = [reader.pages[page_num].extract_text() for page_num in range(start, stop)]
+        num_pages = len(reader.pages)
+    if text_cache is not None:
+        text_cache.put(digest, num_pages, page_texts, start)
+    return page_texts
+
+
+def match_document(url, page_texts, timed=False):
+    """Process-pool task: TOC detection and matching over already extracted pages."""
+    pages = PageTextProvider(page_texts=page_texts, extracted=True)
+    toc = extract_toc(pages)
+    stats = pages.stats()
+    stats["pages"] = len(pages)
+    return url, collect_citations(toc, pages, stats, timed), stats
+
+
+def make_process_pool(workers, max_tasks_per_child=MAX_TASKS_PER_CHILD):
+    try:
+        return ProcessPoolExecutor(workers, max_tasks_per_child=max_tasks_per_child)
+    except TypeError:  # Python < 3.11 cannot recycle workers
+        return ProcessPoolExecutor(workers)
+
+
+class Pipeline:
+    """Runs fetch -> extract -> match -> write, each stage in its own worker pool.
+
+    Stages are joined by bounded queues, so a slow stage blocks the ones
+    upstream of it and at most QUEUE_SIZE documents wait between any two.
+    With `processes` set, extraction and matching run as one stage in a
+    process pool instead, which sidesteps the GIL for the PyPDF2 work, and
+    documents longer than `page_threshold` pages are split into page ranges
+    so one huge PDF is spread over every worker. The worker that picks a
+    document up makes that call, so the event loop's process never parses
+    a PDF, and documents with cached text are never split or opened.
+
+    Citation batches go to the `store` (a CitationStore) when one is given,
+    and to the `sink` unless it is None. With a store, each download is
+    hashed first; documents the store already holds for the same content,
+    extractor and matcher skip parsing and go straight to the writer with
+    their stored citations. With a RunManifest, every URL's progress
+    through the stages is recorded as it happens. Stage timings and
+    counters go to `metrics`; the workers only time themselves when it is
+    enabled.
+
+    With a `profile_dir`, every document is parsed in one hop under
+    cProfile (and tracemalloc, with `profile_memory`) in a process pool,
+    one document per worker at a time, and `profiled` collects each
+    document's parse time. Page-range splitting is off while profiling.
+    """
+
+    STAGE_STATES = {"parse": RunManifest.PARSED, "write": RunManifest.WRITTEN}
+
+    def __init__(self, engine, sink, extract_workers=EXTRACT_WORKERS,
+                 match_workers=MATCH_WORKERS, queue_size=QUEUE_SIZE, processes=0,
+                 page_threshold=PAGE_PARALLEL_THRESHOLD, page_range_size=PAGE_RANGE_SIZE,
+                 text_cache=None, store=None, manifest=None, metrics=NULL_METRICS,
+                 profile_dir=None, profile_memory=False):
+        if profile_dir and not processes:
+            processes = 1  # profilers see the whole process, so keep documents apart
+        self.engine = engine
+        self.sink = sink
+        self.store = store
+        self.manifest = manifest
+        self.metrics = metrics
+        self.timed = metrics.enabled
+        self.extract_workers = processes or extract_workers
+        self.match_workers = match_workers
+        self.queue_size = queue_size
+        self.processes = processes
+        self.page_threshold = page_threshold
+        self.page_range_size = page_range_size
+        self.text_cache = text_cache
+        self.profile_dir = profile_dir
+        self.profile_memory = profile_memory
+        self.profiled = {}  # url -> parse seconds under the profiler
+        self.parse_pool = None
+        self.digests = {}  # url -> SHA-256, from the reuse check to the writer
+        self.written = None  # queue feeding the write stage
+
+    def write_batch(self, url, batch, stats):
+        digest = self.digests.pop(url, None)
+        if "profile_seconds" in stats:
+            self.profiled[url] = stats.pop("profile_seconds")
+        with self.metrics.timer("write", url):
+            if not stats.get("documents_reused"):
+                stats["documents_extracted"] += 1
+                if self.store is not None:
+                    self.store.write_citations(url, batch, stats.get("pages"), digest)
+            if self.sink is not None:
+                self.sink.write_rows(expand_citations(url, batch))
+        stats["citations"] += len(batch)
+        self.metrics.record(url, stats)
+        record_extraction_stats(stats)
+
+    def _fetched(self, url, document):
+        if document is None:
+            self.manifest.fail(url, "download failed")
+        else:
+            self.manifest.mark(url, RunManifest.DOWNLOADED)
+
+    def _record(self, name, url, result, final):
+        if result is None and not final:
+            self.manifest.fail(url, f"{name} failed")
+        elif name in self.STAGE_STATES:
+            self.manifest.mark(url, self.STAGE_STATES[name])
+
+    async def _stage(self, inbox, outbox, func, executor, workers, downstream_workers, name=None):
+        loop = asyncio.get_running_loop()
+
+        async def worker():
+            while (item := await inbox.get()) is not _DONE:
+                try:
+                    if asyncio.iscoroutinefunction(func):
+                        result = await func(*item)
+                    else:
+                        result = await loop.run_in_executor(executor, func, *item)
+                except Exception as e:  # one document's failure (even a dead parser process) must not end the run
+                    print(f"Error processing {item[0]}: {e!r}")
+                    self.metrics.count("stage_errors")
+                    if self.manifest is not None:
+                        self.manifest.fail(item[0], repr(e))
+                    continue
+                if self.manifest is not None and name is not None:
+                    self._record(name, item[0], result, outbox is None)
+                if result is not None and outbox is not None:
+                    await outbox.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        for _ in range(downstream_workers):
+            await outbox.put(_DONE)
+
+    async def _reuse(self, url, document):
+        """Passes changed documents on; unchanged ones go straight to the writer."""
+        if document is None:
+            return url, document
+        loop = asyncio.get_running_loop()
+        with self.metrics.timer("reuse_check", url):
+            digest = self.digests[url] = await loop.run_in_executor(None, document_sha256, document)
+            batch = await loop.run_in_executor(None, self.store.stored_citations, url, digest)
+        if batch is None:
+            return url, document
+        release_document(document)
+        await self.written.put((url, batch, collections.Counter(documents_reused=1)))
+        return None
+
+    def _reuse_stage(self, fetched, workers):
+        """Returns (stages, inbox): the reuse check, when there is a store, and the queue parsing reads."""
+        if self.store is None:
+            return [], fetched
+        checked = asyncio.Queue(self.queue_size)
+        return [self._stage(fetched, checked, self._reuse, None, workers, workers)], checked
+
+    async def _fetch(self, urls, outbox):
+        await self.engine.fetch_into(urls, outbox, self._fetched if self.manifest is not None else None)
+        for _ in range(self.extract_workers):
+            await outbox.put(_DONE)
+
+    async def run(self, urls):
+        try:
+            if self.processes:
+                await self._run_processes(urls)
+            else:
+                await self._run_threads(urls)
+        finally:  # whatever was written so far still reaches the output file
+            if self.sink is not None:
+                with self.metrics.timer("sink_close"):
+                    self.sink.close()
+
+    def _extract(self, url, document):
+        """Thread-mode extract task, reusing the digest the reuse check took (if any) for the text cache."""
+        return extract_stage(url, document, self.text_cache, self.digests.get(url), self.timed)
+
+    async def _parse(self, url, document):
+        loop = asyncio.get_running_loop()
+        if isinstance(document, io.BytesIO):
+            document = document.getvalue()  # BytesIO cannot be pickled to a worker
+        digest = self.digests.get(url)
+        if document is not None and self.text_cache is not None and digest is None:
+            digest = await loop.run_in_executor(None, document_sha256, document)
+        pool = self.parse_pool
+        try:
+            if self.profile_dir:
+                return await loop.run_in_executor(pool, profile_task, self.profile_dir, self.profile_memory,
+                                                  url, parse_document, url, document, self.text_cache, digest,
+                                                  self.timed)
+            result = await loop.run_in_executor(pool, parse_document, url, document,
+                                                self.text_cache, digest, self.timed, self.page_threshold)
+            if result is not None and result[1] is None:  # the worker found it too long to parse alone
+                return await self._parse_page_ranges(url, document, result[2], digest, pool)
+            return result
+        except BrokenProcessPool:
+            with contextlib.suppress(OSError):
+                release_document(document)  # the worker holding it is gone
+            self._replace_parse_pool(pool)
+            raise
+
+    def _replace_parse_pool(self, broken):
+        """Starts a fresh process pool once a parser process has died, so only the
+        documents the broken pool held fail; later documents parse as usual."""
+        if self.parse_pool is broken:
+            print("A parser process died; starting a new process pool")
+            broken.shutdown(wait=False)
+            self.parse_pool = make_process_pool(self.processes)
+
+    async def _parse_page_ranges(self, url, document, num_pages, digest, pool):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            ranges = [(start, min(start + self.page_range_size, num_pages))
+                      for start in range(0, num_pages, self.page_range_size)]
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(pool, extract_page_range, document, start, stop,
+                                     self.text_cache, digest)
+                for start, stop in ranges
+            ))
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            print(f"Error processing {url}: {e}")
+            return None
+        finally:
+            release_document(document)
+        page_texts = [text for chunk in chunks for text in chunk]  # gather keeps page order
+        extracted = time.perf_counter() - started
+        result = await loop.run_in_executor(pool, match_document, url, page_texts, self.timed)
+        if self.timed:
+            result[2]["seconds_extract"] = extracted
+        return result
+
+    async def _run_processes(self, urls):
+        fetched, parsed = (asyncio.Queue(self.queue_size) for _ in range(2))
+        with ThreadPoolExecutor(self.engine.max_in_flight, "fetch") as fetch_pool, \
+                ThreadPoolExecutor(1, "write") as write_pool:
+            self.engine.executor = fetch_pool
+            self.parse_pool = make_process_pool(self.processes)  # replaced if a parser process dies
+            self.written = parsed
+            reuse, inbox = self._reuse_stage(fetched, self.processes)
+            try:
+                await asyncio.gather(
+                    self._fetch(urls, fetched),
+                    *reuse,
+                    self._stage(inbox, parsed, self._parse, None, self.processes, 1, "parse"),
+                    self._stage(parsed, None, self.write_batch, write_pool, 1, 0, "write"),
+                )
+            finally:
+                self.parse_pool.shutdown()
+
+    async def _run_threads(self, urls):
+        fetched, extracted, matched = (asyncio.Queue(self.queue_size) for _ in range(3))
+        with ThreadPoolExecutor(self.engine.max_in_flight, "fetch") as fetch_pool, \
+                ThreadPoolExecutor(self.extract_workers, "extract") as extract_pool, \
+                ThreadPoolExecutor(self.match_workers, "match") as match_pool, \
+                ThreadPoolExecutor(1, "write") as write_pool:
+            self.engine.executor = fetch_pool
+            self.written = matched
+            reuse, inbox = self._reuse_stage(fetched, self.extract_workers)
+            await asyncio.gather(
+                self._fetch(urls, fetched),
+                *reuse,
+                self._stage(inbox, extracted, self._extract, extract_pool, self.extract_workers,
+                            self.match_workers, "extract"),
+                self._stage(extracted, matched, functools.partial(match_stage, timed=self.timed), match_pool,
+                            self.match_workers, 1, "parse"),
+                self._stage(matched, None, self.write_batch, write_pool, 1, 0, "write"),
+            )
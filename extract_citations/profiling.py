@@ -0,0 +1,128 @@
+"""Per-document profiling: cProfile (and optionally tracemalloc) around each parse task.
+
+For every document the profile directory gets NAME.pstats (load it with
+pstats or snakeviz), NAME.collapsed (one "a;b;c microseconds" line per
+stack, the input flamegraph.pl and speedscope expect) and, with memory
+profiling, NAME.memory.txt listing the top allocation sites. NAME is the
+URL's file name plus a short hash of the whole URL.
+"""
+
+
+import cProfile
+import hashlib
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+
+TOP_FUNCTIONS = 5  # functions listed per document in the slowest-documents report
+TOP_ALLOCATIONS = 25
+MAX_STACK_DEPTH = 64
+
+
+def profile_name(url):
+    base = os.path.basename(urlsplit(url).path) or "document"
+    return f"{re.sub(r'[^A-Za-z0-9._-]', '_', base)[:80]}-{hashlib.sha1(url.encode()).hexdigest()[:8]}"
+
+
+def profile_task(out_dir, memory, url, func, *args):
+    """Runs func(*args) under cProfile, writes the profile files for `url` and adds the
+    wall time to the returned stats Counter as "profile_seconds".
+
+    Meant to run in a worker that handles one document at a time, since
+    both profilers see everything the process does while they are on.
+    """
+    path = os.path.join(out_dir, profile_name(url))
+    if memory:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        result = func(*args)
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            write_memory_report(path + ".memory.txt", url, snapshot, peak)
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(path + ".pstats")
+        write_collapsed(path + ".collapsed", stats)
+    if result is not None:
+        result[2]["profile_seconds"] = elapsed
+    return result
+
+
+def write_memory_report(path, url, snapshot, peak):
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    with open(path, "w") as f:
+        f.write(f"{url}\npeak traced memory: {peak / 1024 / 1024:.1f} MiB\n\n")
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            f.write(f"{stat}\n")
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == "~":  # built-ins
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats):
+    """Returns {stack: microseconds} rebuilt from a pstats call graph.
+
+    cProfile keeps caller -> callee edges rather than whole stacks, so a
+    function's time is shared out over the paths leading to it in
+    proportion to each edge's cumulative time. That is exact for
+    functions with one caller and a fair estimate for the rest.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, edge_cumulative))
+    roots = [func for func, (_, _, _, _, callers) in stats.stats.items()
+             if not any(caller in stats.stats for caller in callers)]
+    stacks = {}
+
+    def walk(func, stack, share):
+        _, _, own, cumulative, _ = stats.stats[func]
+        stack = stack + [_label(func)]
+        micros = int(own * share * 1e6)
+        if micros:
+            key = ";".join(stack)
+            stacks[key] = stacks.get(key, 0) + micros
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_cumulative in callees.get(func, ()):
+            callee_cumulative = stats.stats[callee][3]
+            if callee_cumulative and _label(callee) not in stack:  # recursion folds into the first frame
+                walk(callee, stack, share * min(1.0, edge_cumulative / callee_cumulative))
+
+    for root in roots:
+        walk(root, [], 1.0)
+    return stacks
+
+
+def write_collapsed(path, stats):
+    with open(path, "w") as f:
+        for stack, micros in sorted(collapsed_stacks(stats).items()):
+            f.write(f"{stack} {micros}\n")
+
+
+def report_slowest(out_dir, profiled, top=10):
+    """Prints the `top` slowest of `profiled` ({url: seconds}) with their hottest functions."""
+    if not profiled:
+        return
+    print(f"Slowest documents (profiles in {out_dir}):")
+    for url, seconds in sorted(profiled.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {seconds:8.2f}s  {url}")
+        stats = pstats.Stats(os.path.join(out_dir, profile_name(url) + ".pstats"))
+        hottest = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:TOP_FUNCTIONS]
+        for func, (_, calls, own, cumulative, _) in hottest:
+            print(f"      {own:8.3f}s own {cumulative:8.3f}s cumulative {calls:>9} calls  {_label(func)}")
@@ -0,0 +1,182 @@
+"""Output sinks: every one takes rows through write_rows() and finishes the file in close()."""
+
+
+import csv
+import json
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, NamedStyle
+from openpyxl.utils import get_column_letter
+
+from .matching import sanitize_text
+
+
+ROW_GROUP_SIZE = 10000  # rows per Parquet row group / Arrow record batch
+OUTPUT_COLUMNS = ["Citation", "Citation Page", "Inferred Section Name", "Context", "URL"]
+RECORD_FIELDS = ["citation", "citation_page", "section", "context", "url"]  # keys for the data formats
+
+
+def output_row(row):
+    return [sanitize_text(str(cell)) for cell in row]
+
+
+class XlsxSink:
+    """Streams rows into a write-only openpyxl workbook.
+
+    Each row is serialized as it arrives, with the page link and the
+    wrapped URL column styled on the way through via shared named styles,
+    so memory stays flat however many citations a run finds. openpyxl
+    still keeps one small hyperlink record per row until the sheet is
+    closed, because XLSX stores hyperlinks after the sheet data.
+    """
+
+    LINK_COLUMN = 1
+    WRAP_COLUMN = 4
+
+    def __init__(self, filename="extracted_citations.xlsx"):
+        self.filename = filename
+        self.workbook = Workbook(write_only=True)
+        self.workbook.add_named_style(NamedStyle("Wrapped", alignment=Alignment(wrap_text=True)))
+        self.sheet = self.workbook.create_sheet()
+        for col in range(1, len(OUTPUT_COLUMNS) + 1):
+            self.sheet.column_dimensions[get_column_letter(col)].width = 20
+        self.sheet.append(OUTPUT_COLUMNS)
+        self.rows = 0
+
+    def write_rows(self, rows):
+        for row in rows:
+            cells = output_row(row)
+            link = WriteOnlyCell(self.sheet, value=cells[self.LINK_COLUMN])
+            link.hyperlink = link.value
+            link.style = "Hyperlink"
+            wrapped = WriteOnlyCell(self.sheet, value=cells[self.WRAP_COLUMN])
+            wrapped.style = "Wrapped"
+            cells[self.LINK_COLUMN] = link
+            cells[self.WRAP_COLUMN] = wrapped
+            self.sheet.append(cells)
+            self.rows += 1
+
+    def close(self):
+        self.workbook.save(self.filename)
+        print(f"Saved data to {self.filename}")
+
+
+class CsvSink:
+    """Appends rows to a CSV file, with the same header as the workbook, as they arrive."""
+
+    def __init__(self, filename="extracted_citations.csv"):
+        self.filename = filename
+        self.file = open(filename, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(OUTPUT_COLUMNS)
+
+    def write_rows(self, rows):
+        self.writer.writerows(output_row(row) for row in rows)
+
+    def close(self):
+        self.file.close()
+        print(f"Saved data to {self.filename}")
+
+
+class NdjsonSink:
+    """Appends one JSON object per row, keyed by RECORD_FIELDS, as rows arrive."""
+
+    def __init__(self, filename="extracted_citations.ndjson"):
+        self.filename = filename
+        self.file = open(filename, "w", encoding="utf-8")
+
+    def write_rows(self, rows):
+        self.file.writelines(json.dumps(dict(zip(RECORD_FIELDS, output_row(row))), ensure_ascii=False) + "\n"
+                             for row in rows)
+
+    def close(self):
+        self.file.close()
+        print(f"Saved data to {self.filename}")
+
+
+class ColumnarSink:
+    """Buffers rows into columns and writes them as Arrow record batches of `batch_rows`.
+
+    pyarrow is imported here rather than at the top of the script, so the
+    xlsx, csv and ndjson formats keep working without it.
+    """
+
+    def __init__(self, filename, batch_rows=ROW_GROUP_SIZE):
+        import pyarrow
+        self.pa = pyarrow
+        self.filename = filename
+        self.batch_rows = batch_rows
+        self.schema = pyarrow.schema([(name, pyarrow.string()) for name in RECORD_FIELDS])
+        self.pending = []
+        self.writer = self.open_writer()
+
+    def open_writer(self):
+        raise NotImplementedError
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.pending.append(output_row(row))
+            if len(self.pending) >= self.batch_rows:
+                self.flush()
+
+    def flush(self):
+        if self.pending:
+            columns = [self.pa.array(column, self.pa.string()) for column in zip(*self.pending)]
+            self.writer.write_batch(self.pa.RecordBatch.from_arrays(columns, schema=self.schema))
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        print(f"Saved data to {self.filename}")
+
+
+class ParquetSink(ColumnarSink):
+    """One zstd Parquet row group per batch; the repetitive citation, section and URL
+    columns are dictionary-encoded."""
+
+    DICTIONARY_COLUMNS = ["citation", "section", "url"]
+
+    def __init__(self, filename="extracted_citations.parquet", batch_rows=ROW_GROUP_SIZE):
+        super().__init__(filename, batch_rows)
+
+    def open_writer(self):
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetWriter(self.filename, self.schema, compression="zstd",
+                                             use_dictionary=self.DICTIONARY_COLUMNS)
+
+
+class ArrowSink(ColumnarSink):
+    """Arrow IPC file, one record batch per batch, readable with pyarrow.ipc.open_file."""
+
+    def __init__(self, filename="extracted_citations.arrow", batch_rows=ROW_GROUP_SIZE):
+        super().__init__(filename, batch_rows)
+
+    def open_writer(self):
+        import pyarrow.ipc
+        return pyarrow.ipc.new_file(self.filename, self.schema)
+
+
+SINKS = {
+    "xlsx": XlsxSink,
+    "csv": CsvSink,
+    "ndjson": NdjsonSink,
+    "parquet": ParquetSink,
+    "arrow": ArrowSink,
+}
+
+
+PYARROW_FORMATS = ("parquet", "arrow")
+
+
+def make_sink(output_format="xlsx", filename=None):
+    """Returns the sink for `output_format`, writing to extracted_citations.<format> by default."""
+    sink = SINKS[output_format]
+    return sink(filename) if filename else sink()
+
+
+def save_to_excel(data, filename="extracted_citations.xlsx"):
+    sink = XlsxSink(filename)
+    sink.write_rows(data)
+    sink.close()
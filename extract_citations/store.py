@@ -0,0 +1,218 @@
+"""SQLite citation store and run manifest for incremental and resumable runs."""
+
+
+import collections
+import sqlite3
+import threading
+import time
+
+from .matching import MATCHER_VERSION
+from .pdf import EXTRACTOR_VERSION
+from .sinks import ROW_GROUP_SIZE
+
+
+MAX_URL_ATTEMPTS = 5  # runs that may try a failing URL before --resume gives up on it
+URL_RETRY_BACKOFF = 60  # seconds before --resume retries a failed URL, doubled per attempt
+
+
+class CitationStore:
+    """SQLite result store: one row per document, page and citation.
+
+    Citations are upserted on (url, page, offset), so re-running a URL
+    rewrites its rows in place instead of appending to an output file;
+    rows the new run no longer finds are dropped by generation. Output
+    files are exported on demand from the citation_rows view, in the
+    column order of OUTPUT_COLUMNS.
+
+    Each document also records the SHA-256 it was parsed from and the
+    EXTRACTOR_VERSION and MATCHER_VERSION that parsed it, so a later run
+    can reuse its citations while all three still match.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "url TEXT PRIMARY KEY, pages INTEGER, citations INTEGER NOT NULL, "
+                "generation INTEGER NOT NULL, updated REAL NOT NULL, sha256 TEXT, extractor TEXT, matcher TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+            for column in ("sha256", "extractor", "matcher"):  # stores created before content hashing
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE documents ADD COLUMN {column} TEXT")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT NOT NULL, page INTEGER NOT NULL, citations INTEGER NOT NULL, generation INTEGER NOT NULL, "
+                "PRIMARY KEY (url, page)) WITHOUT ROWID"
+            )
+            # the primary key doubles as the index on url
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS citations ("
+                "url TEXT NOT NULL, page INTEGER NOT NULL, offset INTEGER NOT NULL, "
+                "citation TEXT NOT NULL, section TEXT NOT NULL, context TEXT NOT NULL, generation INTEGER NOT NULL, "
+                "PRIMARY KEY (url, page, offset)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS citations_by_citation ON citations (citation)")
+            conn.execute(
+                "CREATE VIEW IF NOT EXISTS citation_rows AS "
+                "SELECT citation, url || '#page=' || page AS citation_page, section, context, url, page, offset "
+                "FROM citations"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def write_citations(self, url, batch, num_pages=None, digest=None):
+        """Stores one document's (citation, page, section, context, offset) batch in a single transaction."""
+        with self._connection() as conn:
+            row = conn.execute("SELECT generation FROM documents WHERE url = ?", (url,)).fetchone()
+            generation = row[0] + 1 if row else 1
+            conn.execute(
+                "INSERT INTO documents (url, pages, citations, generation, updated, sha256, extractor, matcher) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET pages = excluded.pages, citations = excluded.citations, "
+                "generation = excluded.generation, updated = excluded.updated, sha256 = excluded.sha256, "
+                "extractor = excluded.extractor, matcher = excluded.matcher",
+                (url, num_pages, len(batch), generation, time.time(), digest, EXTRACTOR_VERSION, MATCHER_VERSION),
+            )
+            conn.executemany(
+                "INSERT INTO citations (url, page, offset, citation, section, context, generation) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (url, page, offset) DO UPDATE SET citation = excluded.citation, "
+                "section = excluded.section, context = excluded.context, generation = excluded.generation",
+                ((url, page, offset, citation, section_name, context, generation)
+                 for citation, page, section_name, context, offset in batch),
+            )
+            per_page = collections.Counter(page for _, page, _, _, _ in batch)
+            conn.executemany(
+                "INSERT INTO pages (url, page, citations, generation) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (url, page) DO UPDATE SET citations = excluded.citations, "
+                "generation = excluded.generation",
+                ((url, page, per_page[page], generation) for page in range(1, (num_pages or max(per_page, default=0)) + 1)),
+            )
+            conn.execute("DELETE FROM citations WHERE url = ? AND generation < ?", (url, generation))
+            conn.execute("DELETE FROM pages WHERE url = ? AND generation < ?", (url, generation))
+
+    def stored_citations(self, url, digest):
+        """Returns the stored batch for `url` if it was parsed from `digest` by the current
+        extractor and matcher, otherwise None."""
+        conn = self._connection()
+        row = conn.execute("SELECT 1 FROM documents WHERE url = ? AND sha256 = ? AND extractor = ? AND matcher = ?",
+                           (url, digest, EXTRACTOR_VERSION, MATCHER_VERSION)).fetchone()
+        if row is None:
+            return None
+        return conn.execute("SELECT citation, page, section, context, offset FROM citations "
+                            "WHERE url = ? ORDER BY page, offset", (url,)).fetchall()
+
+    def iter_rows(self, urls=None, batch_rows=ROW_GROUP_SIZE):
+        """Yields output rows in batches, for `urls` in the given order or for every stored document."""
+        conn = self._connection()
+        if urls is None:
+            urls = [url for url, in conn.execute("SELECT url FROM documents ORDER BY url")]
+        for url in urls:
+            cursor = conn.execute(
+                "SELECT citation, citation_page, section, context, url FROM citation_rows "
+                "WHERE url = ? ORDER BY page, offset", (url,))
+            while rows := cursor.fetchmany(batch_rows):
+                yield rows
+
+    def export(self, sink, urls=None):
+        """Writes the stored citations through `sink` and closes it."""
+        try:
+            for rows in self.iter_rows(urls):
+                sink.write_rows(rows)
+        finally:
+            sink.close()
+
+
+class RunManifest:
+    """Durable per-URL run state, kept next to the CitationStore tables.
+
+    Every URL moves pending -> downloaded -> parsed -> written, or to
+    failed with the stage that failed. Each state change is committed as
+    it happens, so after a crash or Ctrl-C a --resume run skips written
+    documents, redoes interrupted ones and retries failed ones once their
+    backoff (URL_RETRY_BACKOFF doubled per attempt) has passed, giving up
+    after `max_attempts` runs.
+    """
+
+    PENDING, DOWNLOADED, PARSED, WRITTEN, FAILED = "pending", "downloaded", "parsed", "written", "failed"
+
+    def __init__(self, path, max_attempts=MAX_URL_ATTEMPTS, backoff=URL_RETRY_BACKOFF):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS manifest ("
+                "url TEXT PRIMARY KEY, state TEXT NOT NULL, attempts INTEGER NOT NULL, "
+                "error TEXT, updated REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def start(self, urls, resume=False):
+        """Registers `urls` for this run and returns, in order, the ones to process.
+
+        Without `resume` every URL starts over; with it, written URLs are
+        skipped and failed ones wait out their backoff.
+        """
+        urls = list(dict.fromkeys(urls))
+        now = time.time()
+        counts = collections.Counter()
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO manifest (url, state, attempts, error, updated) VALUES (?, ?, 0, NULL, ?) "
+                + ("ON CONFLICT (url) DO NOTHING" if resume else
+                   "ON CONFLICT (url) DO UPDATE SET state = excluded.state, attempts = 0, error = NULL, "
+                   "updated = excluded.updated"),
+                ((url, self.PENDING, now) for url in urls),
+            )
+            todo = []
+            for url in urls:
+                state, attempts, updated = conn.execute(
+                    "SELECT state, attempts, updated FROM manifest WHERE url = ?", (url,)).fetchone()
+                if state == self.WRITTEN:
+                    counts["done"] += 1
+                elif state == self.FAILED and attempts >= self.max_attempts:
+                    counts["given up"] += 1
+                elif state == self.FAILED and now < updated + self.backoff * 2 ** (attempts - 1):
+                    counts["backing off"] += 1
+                else:
+                    counts["retried" if state == self.FAILED else "to do"] += 1
+                    todo.append(url)
+            conn.executemany("UPDATE manifest SET state = ?, attempts = attempts + 1, updated = ? WHERE url = ?",
+                             ((self.PENDING, now, url) for url in todo))
+        if resume:
+            print("Resuming: " + ", ".join(f"{count} {label}" for label, count in counts.items()))
+        return todo
+
+    def mark(self, url, state):
+        with self._connection() as conn:
+            conn.execute("UPDATE manifest SET state = ?, updated = ? WHERE url = ? AND state != ?",
+                         (state, time.time(), url, self.FAILED))
+
+    def fail(self, url, error):
+        """Marks `url` failed; the first failure of a run keeps its error."""
+        with self._connection() as conn:
+            conn.execute("UPDATE manifest SET state = ?, error = ?, updated = ? WHERE url = ? AND state != ?",
+                         (self.FAILED, str(error), time.time(), url, self.FAILED))
+
+    def report(self):
+        counts = self._connection().execute("SELECT state, COUNT(*) FROM manifest GROUP BY state").fetchall()
+        print("Run manifest: " + ", ".join(f"{count} {state}" for state, count in sorted(counts)))